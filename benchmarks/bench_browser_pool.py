@@ -0,0 +1,59 @@
+"""
+Per-product wall time with a fresh browser per product versus one shared browser pool.
+
+Run from the repository root:
+    python -m benchmarks.bench_browser_pool --limit 5
+"""
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from typing import List
+
+from browser_pool import BrowserPool
+from main_scrapper import scrape_and_extract_details
+
+
+def load_urls(path: str, limit: int) -> List[str]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [item["url"] for item in data if item.get("url")][:limit]
+
+
+async def run_cold(urls: List[str], output_dir: str) -> float:
+    """One browser launch per product, as before the pool existed."""
+    start = time.perf_counter()
+    for url in urls:
+        await scrape_and_extract_details(url, output_dir)
+    return time.perf_counter() - start
+
+
+async def run_pooled(urls: List[str], output_dir: str) -> float:
+    """All products served from one warm pool; pool startup is included."""
+    start = time.perf_counter()
+    async with BrowserPool() as pool:
+        for url in urls:
+            await scrape_and_extract_details(url, output_dir, pool)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--urls-from", default="Outputs/product_details_top_10.json")
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    urls = load_urls(args.urls_from, args.limit)
+    with tempfile.TemporaryDirectory() as output_dir:
+        cold = asyncio.run(run_cold(urls, output_dir))
+        pooled = asyncio.run(run_pooled(urls, output_dir))
+
+    print(f"Products:           {len(urls)}")
+    print(f"Cold start / product: {cold / len(urls):.2f}s")
+    print(f"Pooled / product:     {pooled / len(urls):.2f}s")
+    print(f"Speedup:              {cold / pooled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
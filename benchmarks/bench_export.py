@@ -0,0 +1,97 @@
+"""
+Benchmark of product export: the old per-row dict + pandas DataFrame.to_excel path
+against product_export (one columnar flattening pass, then Excel/CSV/Parquet).
+
+Synthetic catalogs are built by cycling the products of a saved JSON file. Reports
+wall time and peak Python heap (tracemalloc, measured in a second run) per writer. Run from the repository root:
+    python -m benchmarks.bench_export Final_Output/ai_tagline_output_105_women.json --sizes 100 10000 100000
+The legacy pandas path is skipped above --legacy-max products since it does not scale.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import product_export
+from product_export import ProductTable, format_value, format_reviews
+
+
+def legacy_save_to_excel(results: List[Dict], output_file: str):
+    """The previous save_to_excel: a dict per row, then one DataFrame for the whole catalog."""
+    import pandas as pd
+
+    excel_data = []
+    for result in results:
+        row = {
+            "URL": result.get("url", ""),
+            "Editor's Notes": result.get("Editor's Notes", ""),
+            "Images": ", ".join(result.get("Images", [])),
+            "Overall Rating": result.get("Reviews", {}).get("overall_rating", ""),
+            "Number of Reviews": result.get("Reviews", {}).get("number_of_reviews", ""),
+        }
+        for key, value in result.items():
+            if key not in ["url", "Editor's Notes", "Images", "Reviews"]:
+                row[key] = format_value(value)
+        row["All Reviews"] = format_reviews(result.get("Reviews", {}).get("individual_reviews", []))
+        excel_data.append(row)
+    pd.DataFrame(excel_data).to_excel(output_file, index=False)
+
+
+def synthetic_catalog(sample: List[Dict], size: int) -> List[Dict]:
+    products = []
+    for i in range(size):
+        product = dict(sample[i % len(sample)])
+        product["url"] = f"{product.get('url', 'https://example.com/p')}?n={i}"
+        products.append(product)
+    return products
+
+
+def measure(fn: Callable[[], None]) -> Dict:
+    """Times one untraced run, then repeats it under tracemalloc for the peak heap."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": elapsed, "peak_mb": peak / 1024 ** 2}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sample", nargs="?", default="Final_Output/ai_tagline_output_105_women.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with open(args.sample, "r", encoding="utf-8") as f:
+        sample = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            products = synthetic_catalog(sample, size)
+            print(f"\n{size} products")
+            runs = {}
+            if size <= args.legacy_max:
+                runs["legacy pandas .xlsx"] = lambda: legacy_save_to_excel(products, os.path.join(tmp, "legacy.xlsx"))
+
+            table_holder = {}
+            runs["flatten"] = lambda: table_holder.update(table=ProductTable.from_products(products))
+            for ext, writer in product_export.WRITERS.items():
+                runs[f"write {ext}"] = lambda writer=writer, ext=ext: writer(table_holder["table"], os.path.join(tmp, "out" + ext))
+
+            for name, fn in runs.items():
+                try:
+                    result = measure(fn)
+                except ImportError as e:
+                    print(f"  {name:22s} skipped ({e})")
+                    continue
+                print(f"  {name:22s} {result['seconds']:8.2f}s  peak {result['peak_mb']:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
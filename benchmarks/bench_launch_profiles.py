@@ -0,0 +1,174 @@
+"""
+Memory and CPU per page for each browser launch profile (see launch_profiles).
+
+For every profile a BrowserPool is started and the same pages are loaded
+`--concurrency` at a time. The Chromium process tree is sampled while they
+load: idle memory after launch, peak memory while loading (PSS where the OS
+reports it, else RSS) and CPU seconds used. From these it derives memory per
+concurrent page and pages per CPU-second, i.e. how many pages one core keeps
+busy. Pages load with the pool's default request policy, as in production, and
+the share of responses served from the browser's HTTP cache is reported (the
+same pages are loaded repeatedly, so profiles with a disk cache should hit it).
+Needs psutil. Run from the repository root:
+    python -m benchmarks.bench_launch_profiles --profiles production headless --pages 20
+    python -m benchmarks.bench_launch_profiles --html-dir scraped_data   # saved/archived pages, no network
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from browser_pool import BrowserPool
+from html_archive import read_snapshot
+from launch_profiles import LAUNCH_PROFILES
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+class ProcessTreeSampler:
+    """Samples memory and CPU time of every process started below this one (Playwright's driver and Chromium)."""
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.cpu_by_pid: Dict[int, float] = {}
+        self.peak_memory = 0
+        self._task = None
+
+    def memory(self) -> int:
+        total = 0
+        for proc in psutil.Process().children(recursive=True):
+            try:
+                info = proc.memory_full_info()
+                total += getattr(info, "pss", info.rss)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return total
+
+    def sample(self):
+        for proc in psutil.Process().children(recursive=True):
+            try:
+                times = proc.cpu_times()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            # Renderers exit when their page closes, so keep the last value seen per process
+            self.cpu_by_pid[proc.pid] = times.user + times.system
+        self.peak_memory = max(self.peak_memory, self.memory())
+
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(self.cpu_by_pid.values())
+
+    async def _run(self):
+        while True:
+            self.sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self.sample()
+
+
+def load_urls(args) -> List[str]:
+    if args.html_dir:
+        files = sorted(glob.glob(os.path.join(args.html_dir, "**", "*.html"), recursive=True))
+        # Archived snapshots (see html_archive) are compressed; the browser gets decompressed copies
+        archived = sorted(
+            path for pattern in ("*.html.gz", "*.html.zst")
+            for path in glob.glob(os.path.join(args.html_dir, "**", pattern), recursive=True)
+        )
+        if archived:
+            copies = tempfile.mkdtemp(prefix="bench_pages_")
+            for i, path in enumerate(archived):
+                copy = os.path.join(copies, f"page_{i}.html")
+                with open(copy, "w", encoding="utf-8") as f:
+                    f.write(read_snapshot(path))
+                files.append(copy)
+        urls = ["file://" + os.path.abspath(path) for path in files]
+    else:
+        with open(args.urls_from, "r", encoding="utf-8") as f:
+            urls = [item["url"] for item in json.load(f) if item.get("url")]
+    if not urls:
+        raise SystemExit("No pages to load; pass --urls-from or --html-dir")
+    return [urls[i % len(urls)] for i in range(args.pages)]
+
+
+async def run_profile(name: str, urls: List[str], concurrency: int) -> Dict:
+    sampler = ProcessTreeSampler()
+    sampler.sample()
+    baseline_cpu = sampler.cpu_seconds
+
+    launch_start = time.perf_counter()
+    pool = BrowserPool(max_pages_per_context=concurrency, profile=name)
+    async with pool:
+        launch_seconds = time.perf_counter() - launch_start
+        idle_memory = sampler.memory()
+        sampler.peak_memory = idle_memory
+        limit = asyncio.Semaphore(concurrency)
+
+        async def load(url: str):
+            async with limit:
+                async with pool.page() as page:
+                    try:
+                        await page.goto(url, wait_until="load", timeout=60000)
+                    except Exception as e:
+                        print(f"{name}: {url} failed: {e}")
+
+        sampler.start()
+        start = time.perf_counter()
+        await asyncio.gather(*(load(url) for url in urls))
+        seconds = time.perf_counter() - start
+        await sampler.stop()
+
+    cpu_seconds = sampler.cpu_seconds - baseline_cpu
+    totals = pool.filter_totals
+    responses = totals["allowed_requests"]
+    return {
+        "profile": name,
+        "launch_s": round(launch_seconds, 2),
+        "wall_s": round(seconds, 2),
+        "idle_mb": round(idle_memory / 1024 ** 2),
+        "peak_mb": round(sampler.peak_memory / 1024 ** 2),
+        "mb_per_page": round((sampler.peak_memory - idle_memory) / 1024 ** 2 / concurrency, 1),
+        "cpu_s_per_page": round(cpu_seconds / len(urls), 3),
+        "pages_per_cpu_s": round(len(urls) / cpu_seconds, 2) if cpu_seconds else None,
+        "blocked_per_page": round(totals["blocked_requests"] / len(urls), 1),
+        "cached_pct": round(100 * totals["cached_responses"] / responses, 1) if responses else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=["production", "headless"], choices=sorted(LAUNCH_PROFILES))
+    parser.add_argument("--urls-from", default="Outputs/product_details_top_10.json")
+    parser.add_argument("--html-dir", help="load the saved .html files under this directory instead of live URLs")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    if psutil is None:
+        raise SystemExit("This benchmark needs psutil: pip install psutil")
+
+    urls = load_urls(args)
+    rows = [asyncio.run(run_profile(name, urls, args.concurrency)) for name in args.profiles]
+
+    columns = list(rows[0])
+    print(" ".join(f"{column:>15s}" for column in columns))
+    for row in rows:
+        print(" ".join(f"{str(row[column]):>15s}" for column in columns))
+
+
+if __name__ == "__main__":
+    main()
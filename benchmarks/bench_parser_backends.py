@@ -0,0 +1,64 @@
+"""
+Micro-benchmark of extract_product_details across the available parser backends.
+
+Runs over every .html file found under the given paths (saved product pages or
+scraped_page_*.html snapshots) and every compressed .html.gz/.html.zst snapshot
+of an HTML archive (see html_archive). Run from the repository root:
+    python -m benchmarks.bench_parser_backends Outputs scraped_data --repeat 3
+"""
+import argparse
+import glob
+import os
+import time
+from typing import List
+
+from extraction_profiles import load_profile
+from html_archive import read_snapshot
+from html_backends import BACKENDS
+from product_parser import extract_product_details
+
+
+def find_html(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+        else:
+            for pattern in ("*.html", "*.html.gz", "*.html.zst"):
+                files.extend(glob.glob(os.path.join(path, "**", pattern), recursive=True))
+    return sorted(files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="*", default=["Outputs", "scraped_data"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    files = find_html(args.paths)
+    if not files:
+        raise SystemExit(f"No .html files found under {args.paths}; pass a directory of saved product pages.")
+    pages = [read_snapshot(path) for path in files]
+    total_kb = sum(len(p) for p in pages) / 1024
+    print(f"{len(pages)} pages, {total_kb:.0f} KB of HTML, best of {args.repeat}\n")
+
+    baseline = None
+    for name in BACKENDS:
+        try:
+            profile = load_profile("product", backend_name=name)
+        except ImportError as e:
+            print(f"{name:12s} skipped ({e})")
+            continue
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for content in pages:
+                extract_product_details(content, "benchmark", profile)
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        per_page_ms = best / len(pages) * 1000
+        print(f"{name:12s} {per_page_ms:8.2f} ms/page  {baseline / best:5.2f}x vs html.parser")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of sitemap discovery against a synthetic local copy of a site's sitemaps.
+
+Writes robots.txt, a sitemap index and gzipped child sitemaps (product pages
+mixed with category and content pages) into a temporary directory, then runs
+SitemapDiscovery over it. Pass --keep DIR to write the fixture somewhere it
+can be reused. Run from the repository root:
+    python -m benchmarks.bench_sitemap_discovery --products 100000
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import tempfile
+import time
+
+from sitemap_discovery import SitemapDiscovery
+
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def write_fixture(directory: str, products: int, per_sitemap: int = 10000) -> int:
+    """Writes the fixture site and returns the total number of <url> entries."""
+    urls = []
+    for i in range(products):
+        urls.append(f"https://www.coach.com/products/bag-{i}/C{i:06d}-B4BK.html")
+        if i % 10 == 0:
+            # A tracking variant of the same product, and pages that are not products
+            urls.append(f"https://www.coach.com/products/bag-{i}/C{i:06d}-B4BK.html?rrec=true")
+            urls.append(f"https://www.coach.com/products/c/category-{i}")
+            urls.append(f"https://www.coach.com/stories/story-{i}")
+
+    children = []
+    for start in range(0, len(urls), per_sitemap):
+        name = f"sitemap_{start // per_sitemap}.xml.gz"
+        with gzip.open(os.path.join(directory, name), "wt", encoding="utf-8") as f:
+            f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="{SITEMAP_NS}">\n')
+            for url in urls[start:start + per_sitemap]:
+                f.write(f"<url><loc>{url}</loc><changefreq>daily</changefreq></url>\n")
+            f.write("</urlset>\n")
+        children.append(name)
+
+    with open(os.path.join(directory, "sitemap_index.xml"), "w", encoding="utf-8") as f:
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="{SITEMAP_NS}">\n')
+        for name in children:
+            f.write(f"<sitemap><loc>{name}</loc></sitemap>\n")
+        f.write("</sitemapindex>\n")
+
+    with open(os.path.join(directory, "robots.txt"), "w", encoding="utf-8") as f:
+        f.write("User-agent: *\nDisallow: /cart\nSitemap: sitemap_index.xml\n")
+    return len(urls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--keep", help="write the fixture to this directory instead of a temporary one")
+    args = parser.parse_args()
+
+    directory = args.keep or tempfile.mkdtemp(prefix="sitemaps_")
+    os.makedirs(directory, exist_ok=True)
+    total = write_fixture(directory, args.products)
+    print(f"Fixture: {total} sitemap URLs in {directory}")
+
+    start = time.perf_counter()
+    frontier = asyncio.run(SitemapDiscovery().discover([os.path.join(directory, "robots.txt")]))
+    seconds = time.perf_counter() - start
+    print(f"{len(frontier)} products from {total} URLs in {seconds:.2f}s "
+          f"({seconds * 1000 / (total / 1000):.2f} ms per 1000 URLs)")
+
+
+if __name__ == "__main__":
+    main()
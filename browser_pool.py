@@ -0,0 +1,284 @@
+import asyncio
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple, Union
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from launch_profiles import DiskCacheLease, LaunchProfile, get_launch_profile
+from request_filter import DEFAULT_REQUEST_POLICY, RequestFilterStats, RequestPolicy, install_request_filter
+
+
+class _PooledBrowser:
+    """
+    One warm Chromium instance and its contexts, plus the bookkeeping the pool
+    needs to decide where the next page goes and when to recycle the browser.
+    """
+
+    def __init__(
+        self,
+        browser: Browser,
+        contexts: List[BrowserContext],
+        disk_cache: Optional[DiskCacheLease] = None,
+        profile_dir: Optional[str] = None,
+    ):
+        self.browser = browser
+        self.contexts = contexts
+        # The locked disk cache directory and the throwaway profile directory, if any
+        self.disk_cache = disk_cache
+        self.profile_dir = profile_dir
+        self.open_pages = [0] * len(contexts)
+        self.pages_served = 0
+        self.retiring = False
+        self.recycling = False
+        # A crashed or killed browser must never receive new pages
+        browser.on("disconnected", lambda _: self._mark_retiring())
+
+    def _mark_retiring(self):
+        self.retiring = True
+
+    async def close(self):
+        """Closes the browser, deletes its throwaway profile and frees its disk cache directory."""
+        try:
+            await self.browser.close()
+        except Exception:
+            pass
+        if self.profile_dir is not None:
+            await asyncio.to_thread(shutil.rmtree, self.profile_dir, True)
+        if self.disk_cache is not None:
+            self.disk_cache.release()
+
+    @property
+    def in_flight(self) -> int:
+        return sum(self.open_pages)
+
+
+class BrowserPool:
+    """
+    Long-lived pool of warm Chromium browsers and contexts that hands out pages
+    and takes them back.
+
+    - `size` browsers are launched once, each with `contexts_per_browser` contexts.
+    - At most `max_pages_per_context` pages are open in any context at a time;
+      callers wait until a slot frees up.
+    - A browser is recycled (closed and relaunched) once it has served
+      `max_pages_per_browser` pages, which bounds slow memory leaks, or as soon
+      as it disconnects or fails to open a page.
+    - Every page applies `request_policy` (see request_filter) so images,
+      fonts, media and trackers are never downloaded; pass None to load
+      everything. The default policy is applied inside the browser, so the
+      profile's disk cache keeps working. Counters summed over every page are kept in
+      `filter_totals` and printed once when the pool closes.
+    - Browsers are launched with `profile` (see launch_profiles): a
+      LaunchProfile or its name, by default the one named by the
+      BROWSER_PROFILE environment variable, else "production" (headless,
+      lightweight switches, small viewport, HTTP disk cache kept across runs;
+      no cookies or other site state are kept).
+      `headless` overrides the profile's setting when given.
+
+    Usage:
+        async with BrowserPool() as pool:
+            async with pool.page() as page:
+                await page.goto(url)
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        contexts_per_browser: int = 1,
+        max_pages_per_context: int = 4,
+        max_pages_per_browser: int = 200,
+        headless: Optional[bool] = None,
+        request_policy: Optional[RequestPolicy] = DEFAULT_REQUEST_POLICY,
+        profile: Union[LaunchProfile, str, None] = None,
+    ):
+        self.size = size
+        self.contexts_per_browser = contexts_per_browser
+        self.max_pages_per_context = max_pages_per_context
+        self.max_pages_per_browser = max_pages_per_browser
+        self.profile = get_launch_profile(profile)
+        self.headless = self.profile.headless if headless is None else headless
+        self.request_policy = request_policy
+
+        self._playwright = None
+        self._browsers: List[_PooledBrowser] = []
+        self._leases: Dict[Page, Tuple[_PooledBrowser, int]] = {}
+        self._filter_stats: Dict[Page, RequestFilterStats] = {}
+        self.filter_totals: Dict = {
+            "pages": 0,
+            "blocked_requests": 0,
+            "blocked_by_reason": {},
+            "estimated_bytes_saved": 0,
+            "allowed_requests": 0,
+            "bytes_loaded": 0,
+            "cached_responses": 0,
+        }
+        self._cond = asyncio.Condition()
+        self.recycled = 0
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        """Starts Playwright and launches the warm browsers."""
+        if self._playwright is not None:
+            return
+        self._playwright = await async_playwright().start()
+        self._browsers = [await self._launch() for _ in range(self.size)]
+
+    async def close(self):
+        """Closes every browser, stops Playwright and prints the request filter totals."""
+        for pooled in self._browsers:
+            await pooled.close()
+        self._browsers = []
+        self._leases.clear()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        totals = self.filter_totals
+        if totals["pages"]:
+            pages = totals["pages"]
+            print(f"Request filter: blocked {totals['blocked_requests']} requests on {pages} pages "
+                  f"{totals['blocked_by_reason']}, ~{totals['estimated_bytes_saved'] // 1024} KB saved "
+                  f"(per page: {totals['blocked_requests'] / pages:.1f} blocked, "
+                  f"~{totals['estimated_bytes_saved'] / pages / 1024:.1f} KB saved)")
+
+    async def _launch(self) -> _PooledBrowser:
+        """Launches a browser, with a disk cache directory of its own when the profile has a cache_dir."""
+        launch_options = dict(self.profile.launch_options(), headless=self.headless)
+        context_options = self.profile.context_options()
+        chromium = self._playwright.chromium
+
+        disk_cache = self.profile.claim_disk_cache()
+        if self.profile.cache_dir is not None and disk_cache is None:
+            print(f"Every browser cache directory under {self.profile.cache_dir} is in use, launching without one")
+        if disk_cache is not None:
+            # Only a persistent profile keeps a disk cache. The profile itself is throwaway, so only
+            # the cache (in the locked directory) outlives the browser; further contexts are regular ones
+            profile_dir = tempfile.mkdtemp(prefix="scraper_profile_")
+            options = dict(launch_options, args=launch_options["args"] + disk_cache.launch_args())
+            try:
+                first = await chromium.launch_persistent_context(profile_dir, **options, **context_options)
+                if first.browser is None:
+                    await first.close()
+                    raise RuntimeError("persistent context has no browser handle")
+                contexts = [first] + [
+                    await first.browser.new_context(**context_options) for _ in range(self.contexts_per_browser - 1)
+                ]
+                return _PooledBrowser(first.browser, contexts, disk_cache, profile_dir)
+            except Exception as e:
+                print(f"Browser cache {disk_cache.path} unavailable ({e}), launching without it")
+                shutil.rmtree(profile_dir, ignore_errors=True)
+                disk_cache.release()
+
+        browser = await chromium.launch(**launch_options)
+        contexts = [await browser.new_context(**context_options) for _ in range(self.contexts_per_browser)]
+        return _PooledBrowser(browser, contexts)
+
+    def _pick_context(self) -> Optional[Tuple[_PooledBrowser, int]]:
+        """Returns the least loaded context that still has room, if any."""
+        best = None
+        for pooled in self._browsers:
+            if pooled.retiring:
+                continue
+            for idx, open_count in enumerate(pooled.open_pages):
+                if open_count >= self.max_pages_per_context:
+                    continue
+                if best is None or open_count < best[0].open_pages[best[1]]:
+                    best = (pooled, idx)
+        return best
+
+    async def acquire(self) -> Page:
+        """Waits for a free slot and opens a new page in a warm context."""
+        if self._playwright is None:
+            raise RuntimeError("BrowserPool is not started")
+
+        async with self._cond:
+            choice = self._pick_context()
+            while choice is None:
+                if not self._browsers:
+                    raise RuntimeError("BrowserPool has no browsers left")
+                await self._cond.wait()
+                choice = self._pick_context()
+            pooled, idx = choice
+            pooled.open_pages[idx] += 1
+            pooled.pages_served += 1
+            if pooled.pages_served >= self.max_pages_per_browser:
+                pooled.retiring = True
+
+        try:
+            page = await pooled.contexts[idx].new_page()
+        except Exception:
+            pooled.retiring = True
+            await self._return_slot(pooled, idx)
+            raise
+
+        self._leases[page] = (pooled, idx)
+        if self.request_policy is not None:
+            try:
+                self._filter_stats[page] = await install_request_filter(page, self.request_policy)
+            except Exception:
+                await self.release(page)
+                raise
+        return page
+
+    def _add_filter_report(self, report: Dict):
+        totals = self.filter_totals
+        totals["pages"] += 1
+        for key in ("blocked_requests", "estimated_bytes_saved", "allowed_requests", "bytes_loaded", "cached_responses"):
+            totals[key] += report[key]
+        for reason, count in report["blocked_by_reason"].items():
+            totals["blocked_by_reason"][reason] = totals["blocked_by_reason"].get(reason, 0) + count
+
+    async def release(self, page: Page):
+        """Closes a page handed out by `acquire` and frees its slot."""
+        pooled, idx = self._leases.pop(page)
+        stats = self._filter_stats.pop(page, None)
+        if stats is not None:
+            self._add_filter_report(stats.report(page.url))
+        try:
+            await page.close()
+        except Exception:
+            # The page can only fail to close if its browser went away
+            pooled.retiring = True
+        await self._return_slot(pooled, idx)
+
+    @asynccontextmanager
+    async def page(self):
+        """Context manager form of acquire/release."""
+        page = await self.acquire()
+        try:
+            yield page
+        finally:
+            await self.release(page)
+
+    async def _return_slot(self, pooled: _PooledBrowser, idx: int):
+        async with self._cond:
+            pooled.open_pages[idx] -= 1
+            if not pooled.browser.is_connected():
+                pooled.retiring = True
+            recycle = pooled.retiring and pooled.in_flight == 0 and not pooled.recycling
+            if recycle:
+                pooled.recycling = True
+
+        if recycle:
+            await self._recycle(pooled)
+
+        async with self._cond:
+            self._cond.notify_all()
+
+    async def _recycle(self, pooled: _PooledBrowser):
+        """Replaces a retired browser with a freshly launched one."""
+        await pooled.close()
+        if pooled not in self._browsers or self._playwright is None:
+            return
+        position = self._browsers.index(pooled)
+        try:
+            self._browsers[position] = await self._launch()
+            self.recycled += 1
+        except Exception as e:
+            print(f"Failed to relaunch browser: {e}")
+            self._browsers.pop(position)
@@ -0,0 +1,78 @@
+import json
+import os
+from typing import Dict, List
+
+
+class CrawlCheckpoint:
+    """
+    Append-only JSON Lines log of finished products, keyed by URL.
+
+    Each finished product is written as one {"url": ..., "result": ...} line and
+    flushed immediately, so a crash loses at most the line being written. On
+    open, the existing log is replayed (a torn final line is ignored) and later
+    entries for the same URL win.
+
+    Usage:
+        with CrawlCheckpoint("crawl.checkpoint.jsonl") as checkpoint:
+            pending = checkpoint.pending(urls)
+            ...
+            checkpoint.record(url, result)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed: Dict[str, Dict] = {}
+        self._file = None
+        self._needs_newline = False
+        self._load()
+
+    def __enter__(self) -> "CrawlCheckpoint":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            line = ""
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Partially written line from an interrupted run
+                    continue
+                self.completed[entry["url"]] = entry["result"]
+        # Start appending on a fresh line even if the last write was torn
+        self._needs_newline = bool(line) and not line.endswith("\n")
+
+    def is_done(self, url: str) -> bool:
+        return url in self.completed
+
+    def pending(self, urls: List[str]) -> List[str]:
+        """URLs that have no recorded result yet, in input order."""
+        return [url for url in urls if url not in self.completed]
+
+    def record(self, url: str, result: Dict):
+        """Appends one finished product to the log and flushes it to disk."""
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            if self._needs_newline:
+                self._file.write("\n")
+        self._file.write(json.dumps({"url": url, "result": result}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.completed[url] = result
+
+    def results_for(self, urls: List[str]) -> List[Dict]:
+        """Recorded results for the given URLs, in input order, skipping unfinished ones."""
+        return [self.completed[url] for url in urls if url in self.completed]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,211 @@
+import os
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from link_discovery import UrlFrontier
+
+# Lifecycle of a URL: pending -> leased -> done, or back to pending after a
+# failure until it has failed max_failures times, then failed
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    priority REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    discovered_at TEXT NOT NULL,
+    last_crawled TEXT,
+    failure_count INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    leased_by TEXT,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS urls_schedule ON urls (status, priority DESC, failure_count, seq);
+CREATE TABLE IF NOT EXISTS url_categories (
+    url TEXT NOT NULL,
+    category TEXT NOT NULL,
+    PRIMARY KEY (url, category)
+);
+"""
+
+
+class CrawlFrontier:
+    """
+    Persistent crawl frontier in a SQLite file, shared by every scraper process using it.
+
+    Each URL is stored with its priority, status, discovery and last-crawled
+    times, failure count and last error, and the categories (or sitemaps) it
+    was discovered from. Workers lease() batches of URLs: highest priority
+    first, then fewest failures, then discovery order. A lease is taken inside
+    one write transaction, so two workers never get the same URL. A lease that
+    is not completed within `lease_seconds` (the worker died) expires and the
+    URL is handed out again. complete(), fail() and release() only apply while
+    this worker still holds the lease, so a worker whose lease expired cannot
+    undo the work of the one that took the URL over; workers with long
+    batches renew() their leases to keep them.
+
+    SQLite's file locking makes this safe for any number of processes on one
+    machine or on a local volume; it is not meant to live on a network share.
+
+    Usage:
+        with CrawlFrontier("scraped_data/frontier.sqlite") as frontier:
+            frontier.add_all(discovered)
+            for url in frontier.lease(20):
+                ...
+                frontier.complete(url)   # or frontier.fail(url, reason)
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 900, max_failures: int = 3, worker_id: Optional[str] = None):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_failures = max_failures
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Autocommit mode: every transaction below is opened explicitly
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def __enter__(self) -> "CrawlFrontier":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """A write transaction that takes the database's write lock up front, so reads inside it stay valid."""
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._db
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _write(self, sql: str, params: Iterable = ()) -> sqlite3.Cursor:
+        with self._transaction() as db:
+            return db.execute(sql, params)
+
+    def add(self, url: str, categories: Iterable[str] = (), priority: float = 0) -> bool:
+        """
+        Adds a URL, or merges its categories into the stored one and raises its
+        priority if `priority` is higher. True when the URL was new.
+        """
+        return self.add_all([{"url": url, "categories": list(categories)}], priority) == 1
+
+    def add_all(self, entries, priority: float = 0) -> int:
+        """
+        Adds every {"url", "categories"} entry (or every URL of a UrlFrontier) in
+        one transaction, like add(). Returns the number of new URLs.
+        """
+        if isinstance(entries, UrlFrontier):
+            entries = entries.entries()
+        now = datetime.now().isoformat()
+        with self._transaction() as db:
+            before = db.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+            for entry in entries:
+                db.execute(
+                    "INSERT INTO urls (url, priority, discovered_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (url) DO UPDATE SET priority = MAX(priority, excluded.priority)",
+                    (entry["url"], priority, now),
+                )
+                db.executemany(
+                    "INSERT OR IGNORE INTO url_categories (url, category) VALUES (?, ?)",
+                    [(entry["url"], category) for category in entry.get("categories", [])],
+                )
+            return db.execute("SELECT COUNT(*) FROM urls").fetchone()[0] - before
+
+    def lease(self, limit: int) -> List[str]:
+        """Atomically takes up to `limit` URLs that are pending or whose lease expired, best first."""
+        now = time.time()
+        with self._transaction() as db:
+            urls = [row[0] for row in db.execute(
+                "SELECT url FROM urls WHERE status = ? OR (status = ? AND lease_expires < ?) "
+                "ORDER BY priority DESC, failure_count, seq LIMIT ?",
+                (PENDING, LEASED, now, limit),
+            )]
+            db.executemany(
+                "UPDATE urls SET status = ?, leased_by = ?, lease_expires = ? WHERE url = ?",
+                [(LEASED, self.worker_id, now + self.lease_seconds, url) for url in urls],
+            )
+        return urls
+
+    def _held(self, url: str, updated: bool, action: str) -> bool:
+        if not updated:
+            print(f"Frontier: lease on {url} lost to another worker, not marking it {action}")
+        return updated
+
+    def complete(self, url: str) -> bool:
+        """Marks a URL this worker leased as crawled now. False when the lease was lost."""
+        return self._held(url, self._write(
+            "UPDATE urls SET status = ?, last_crawled = ?, failure_count = 0, last_error = NULL, "
+            "leased_by = NULL, lease_expires = NULL WHERE url = ? AND status = ? AND leased_by = ?",
+            (DONE, datetime.now().isoformat(), url, LEASED, self.worker_id),
+        ).rowcount == 1, DONE)
+
+    def fail(self, url: str, error: str) -> bool:
+        """
+        Counts a failed crawl of a URL this worker leased; the URL is retried later
+        until it has failed max_failures times. False when the lease was lost.
+        """
+        return self._held(url, self._write(
+            "UPDATE urls SET failure_count = failure_count + 1, last_error = ?, "
+            "status = CASE WHEN failure_count + 1 >= ? THEN ? ELSE ? END, "
+            "leased_by = NULL, lease_expires = NULL WHERE url = ? AND status = ? AND leased_by = ?",
+            (error, self.max_failures, FAILED, PENDING, url, LEASED, self.worker_id),
+        ).rowcount == 1, FAILED)
+
+    def release(self, urls: Iterable[str]):
+        """Hands URLs this worker leased back untouched, e.g. when it is shutting down mid-batch."""
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE urls SET status = ?, leased_by = NULL, lease_expires = NULL "
+                "WHERE url = ? AND status = ? AND leased_by = ?",
+                [(PENDING, url, LEASED, self.worker_id) for url in urls],
+            )
+
+    def renew(self, urls: Iterable[str]) -> int:
+        """Extends this worker's leases on `urls` by lease_seconds from now. Returns how many it still held."""
+        expires = time.time() + self.lease_seconds
+        with self._transaction() as db:
+            return db.executemany(
+                "UPDATE urls SET lease_expires = ? WHERE url = ? AND status = ? AND leased_by = ?",
+                [(expires, url, LEASED, self.worker_id) for url in urls],
+            ).rowcount
+
+    def requeue(self, crawled_before: timedelta) -> int:
+        """Makes URLs last crawled more than `crawled_before` ago pending again, for a re-crawl."""
+        cutoff = (datetime.now() - crawled_before).isoformat()
+        return self._write(
+            "UPDATE urls SET status = ? WHERE status = ? AND last_crawled < ?", (PENDING, DONE, cutoff)
+        ).rowcount
+
+    def categories(self, url: str) -> List[str]:
+        return [row[0] for row in self._db.execute("SELECT category FROM url_categories WHERE url = ?", (url,))]
+
+    def get(self, url: str) -> Optional[Dict]:
+        cursor = self._db.execute("SELECT * FROM urls WHERE url = ?", (url,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        entry = dict(zip([column[0] for column in cursor.description], row))
+        entry["categories"] = self.categories(url)
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        """Number of URLs in each status."""
+        return dict(self._db.execute("SELECT status, COUNT(*) FROM urls GROUP BY status").fetchall())
@@ -0,0 +1,71 @@
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+from html_backends import ParserBackend, get_backend
+
+PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+DEFAULT_SITE = "coach.com"
+
+
+class CompiledProfile:
+    """
+    Selectors for one site and page type, compiled once into backend matchers.
+
+    `profile["field"]` returns the compiled matcher (or a nested CompiledProfile
+    for a selector group), `profile.css("field")` the raw CSS for code that hands
+    selectors to the browser instead.
+    """
+
+    def __init__(self, site: str, page_type: str, selectors: Dict[str, Any], backend: ParserBackend):
+        self.site = site
+        self.page_type = page_type
+        self.backend = backend
+        self._css: Dict[str, Any] = {}
+        self._matchers: Dict[str, Any] = {}
+        for name, css in selectors.items():
+            if isinstance(css, dict):
+                group = CompiledProfile(site, f"{page_type}.{name}", css, backend)
+                self._css[name] = group
+                self._matchers[name] = group
+            else:
+                self._css[name] = css
+                self._matchers[name] = backend.compile(css)
+
+    def __getitem__(self, name: str) -> Any:
+        return self._matchers[name]
+
+    def css(self, name: str) -> str:
+        return self._css[name]
+
+
+def site_for_url(url: str) -> str:
+    """Maps a URL to the profile directory of its site, e.g. www.coach.com -> coach.com."""
+    host = (urlparse(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host and os.path.isdir(os.path.join(PROFILE_DIR, host)):
+        return host
+    return DEFAULT_SITE
+
+
+def read_profile(page_type: str, site: str = DEFAULT_SITE) -> Dict:
+    """Reads the raw profile JSON at profiles/<site>/<page_type>.json."""
+    path = os.path.join(PROFILE_DIR, site, f"{page_type}.json")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def load_profile(page_type: str, site: str = DEFAULT_SITE, backend_name: Optional[str] = None) -> CompiledProfile:
+    """
+    Loads and compiles a profile. Cached, so each process compiles a given
+    site/page type/backend combination exactly once.
+    """
+    raw = read_profile(page_type, site)
+    return CompiledProfile(site, page_type, raw["selectors"], get_backend(backend_name))
+
+
+def profile_for_url(url: str, page_type: str, backend_name: Optional[str] = None) -> CompiledProfile:
+    return load_profile(page_type, site_for_url(url), backend_name)
@@ -0,0 +1,239 @@
+import asyncio
+import collections
+import random
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import httpx
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from jsonl_io import JsonlWriter
+from rate_limiter import ThrottledError
+
+# Failure kinds, each with its own retry budget
+TIMEOUT = "timeout"
+THROTTLED = "throttled"
+MISSING_SELECTORS = "missing_selectors"
+ERROR = "error"
+
+
+class MissingSelectorsError(Exception):
+    """The page loaded, but none of the selectors the extractor needs ever appeared."""
+
+    def __init__(self, url: str, missing: List[str]):
+        super().__init__(f"selectors {missing} never appeared")
+        self.url = url
+        self.missing = missing
+
+
+def classify_failure(exc: BaseException) -> str:
+    if isinstance(exc, MissingSelectorsError):
+        return MISSING_SELECTORS
+    if isinstance(exc, ThrottledError):
+        return THROTTLED
+    if isinstance(exc, (asyncio.TimeoutError, PlaywrightTimeoutError, httpx.TimeoutException)):
+        return TIMEOUT
+    return ERROR
+
+
+class RetryPolicy:
+    """
+    How many attempts each failure kind gets and how long to back off between them.
+
+    Timeouts and 429/5xx responses usually mean the site is slow or throttling,
+    so they get the full budget. A page that rendered without any product selectors is most likely a
+    block or interstitial page and only gets one more try by default.
+    Backoff is exponential with full jitter: a uniform delay in
+    [0, min(max_delay, base_delay * 2 ** (attempt - 1))].
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        attempts_by_kind: Optional[Dict[str, int]] = None,
+    ):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempts_by_kind = {
+            TIMEOUT: max_attempts,
+            THROTTLED: max_attempts,
+            ERROR: max_attempts,
+            MISSING_SELECTORS: min(2, max_attempts),
+        }
+        self.attempts_by_kind.update(attempts_by_kind or {})
+
+    def attempts_for(self, kind: str) -> int:
+        return self.attempts_by_kind.get(kind, 1)
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker for one host.
+
+    While closed, the outcomes of the last `window` attempts are tracked. Once at
+    least `min_calls` have been seen and the failure share reaches `failure_rate`,
+    the breaker opens and every caller waits in wait_until_closed() for
+    `cooldown` seconds. Then a single probe request is let through: success
+    closes the breaker, failure reopens it for another cooldown.
+    """
+
+    def __init__(self, window: int = 20, min_calls: int = 5, failure_rate: float = 0.5, cooldown: float = 30.0):
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.trips = 0
+        self._outcomes = collections.deque(maxlen=window)
+        self._opened_until = 0.0
+        self._probing = False
+
+    async def wait_until_closed(self):
+        while True:
+            if self.state == "closed":
+                return
+            if self.state == "open":
+                remaining = self._opened_until - time.monotonic()
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+                    continue
+                self.state = "half_open"
+                self._probing = False
+            if not self._probing:
+                self._probing = True
+                return
+            await asyncio.sleep(min(1.0, self.cooldown))
+
+    def record(self, success: bool):
+        if self.state == "half_open":
+            self._probing = False
+            if success:
+                self.state = "closed"
+                self._outcomes.clear()
+            else:
+                self._open()
+            return
+        self._outcomes.append(success)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+            self._open()
+
+    def abandon_probe(self):
+        """Lets another caller probe when the current probe was cancelled before it finished."""
+        if self.state == "half_open":
+            self._probing = False
+
+    def _open(self):
+        self.state = "open"
+        self.trips += 1
+        self._opened_until = time.monotonic() + self.cooldown
+        self._outcomes.clear()
+
+
+class DeadLetterList:
+    """
+    URLs that failed every attempt, with the reason. Entries are also appended
+    to `path` as JSON Lines when one is given, so they survive the run and can
+    be fed back into the next crawl.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: List[Dict] = []
+
+    def add(self, url: str, kind: str, reason: str, attempts: int):
+        entry = {
+            "url": url,
+            "kind": kind,
+            "reason": reason,
+            "attempts": attempts,
+            "failed_at": datetime.now().isoformat(),
+        }
+        self.entries.append(entry)
+        if self.path is not None:
+            with JsonlWriter(self.path, append=True) as writer:
+                writer.write(entry)
+
+    def urls(self) -> List[str]:
+        return [entry["url"] for entry in self.entries]
+
+    def summary(self) -> Dict:
+        by_kind: Dict[str, int] = {}
+        for entry in self.entries:
+            by_kind[entry["kind"]] = by_kind.get(entry["kind"], 0) + 1
+        return {"failed": len(self.entries), "by_kind": by_kind}
+
+
+class FailurePolicy:
+    """
+    Runs each URL's scrape with retries, a per-host circuit breaker and a dead-letter list.
+
+    Attempts for a host wait while its breaker is open, so a host that starts
+    failing is paused instead of burning through its URLs. Backoff sleeps
+    happen outside the caller's concurrency slots. A URL that exhausts its
+    attempts is added to `dead_letters` and comes back as {}.
+
+    Usage:
+        policy = FailurePolicy(dead_letter_path="scraped_data/dead_letters.jsonl")
+        product = await policy.run(url, lambda: scrape_once(url))
+    """
+
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        breaker_settings: Optional[Dict] = None,
+        dead_letter_path: Optional[str] = None,
+    ):
+        self.retry = retry or RetryPolicy()
+        self.breaker_settings = breaker_settings or {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.dead_letters = DeadLetterList(dead_letter_path)
+        self.retries = 0
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc
+        if host not in self.breakers:
+            self.breakers[host] = CircuitBreaker(**self.breaker_settings)
+        return self.breakers[host]
+
+    async def run(self, url: str, attempt: Callable[[], Awaitable[Dict]]) -> Dict:
+        breaker = self.breaker_for(url)
+        attempt_number = 0
+        while True:
+            attempt_number += 1
+            await breaker.wait_until_closed()
+            try:
+                result = await attempt()
+            except asyncio.CancelledError:
+                breaker.abandon_probe()
+                raise
+            except Exception as e:
+                kind = classify_failure(e)
+                was_closed = breaker.state == "closed"
+                breaker.record(False)
+                if was_closed and breaker.state == "open":
+                    print(f"Circuit open for {urlparse(url).netloc}, pausing it for {breaker.cooldown}s")
+                if attempt_number >= self.retry.attempts_for(kind):
+                    print(f"Error Processing {url}: ", e)
+                    self.dead_letters.add(url, kind, str(e), attempt_number)
+                    return {}
+                delay = self.retry.backoff(attempt_number)
+                print(f"Retrying {url} after {kind} (attempt {attempt_number}) in {delay:.1f}s")
+                self.retries += 1
+                await asyncio.sleep(delay)
+                continue
+            breaker.record(True)
+            return result
+
+    def summary(self) -> Dict:
+        return {
+            "retries": self.retries,
+            "breaker_trips": {host: b.trips for host, b in self.breakers.items() if b.trips},
+            "dead_letters": self.dead_letters.summary(),
+        }
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+# Keys that describe how a product was fetched rather than what it contains
+VOLATILE_KEYS = ("fetch_path",)
+
+
+def content_hash(product: Dict) -> str:
+    """Stable SHA-256 of a product's extracted fields."""
+    stable = {k: v for k, v in product.items() if k not in VOLATILE_KEYS}
+    encoded = json.dumps(stable, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Per-URL fingerprints from the last crawl, kept in one JSON file.
+
+    Each entry holds:
+      - content_hash:   hash of the full extracted product
+      - http_hash:      hash of what plain HTTP extraction saw, used to detect changes
+                        without a browser (None when the page could not be fetched)
+      - etag / last_modified: validators for conditional requests, when the server sends them
+      - content_length: size of the last HTTP response body
+      - last_crawled:   ISO timestamp of the last full extraction
+      - product:        the last extracted product, reused when the page is unchanged
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, url: str) -> Optional[Dict]:
+        return self.entries.get(url)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for the URL's last known validators."""
+        entry = self.entries.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, product: Dict, validators: Optional[Dict] = None):
+        """Records a fresh full extraction along with the validators seen for it."""
+        entry = dict(validators or {})
+        entry["content_hash"] = content_hash(product)
+        entry["last_crawled"] = datetime.now().isoformat()
+        entry["product"] = product
+        self.entries[url] = entry
+
+    def save(self):
+        """Writes the store atomically, so an interrupted save never corrupts it."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,190 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # gzip is always available
+    zstandard = None
+
+
+def read_snapshot(path: str) -> str:
+    """Reads a snapshot file, decompressing .gz/.zst archive objects and passing plain .html through."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(".zst"):
+        data = zstandard.ZstdDecompressor().decompress(data)
+    elif path.endswith(".gz"):
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+
+class HtmlArchive:
+    """
+    Content-addressed, compressed store of scraped HTML snapshots.
+
+    Snapshots are stored once per distinct content under
+    `<root>/objects/<hash[:2]>/<hash>.html.<ext>`, so re-scraping an unchanged
+    page costs no extra disk. `<root>/index.jsonl` is an append-only log mapping
+    each URL to its latest snapshot; it is replayed into a dict on open, so
+    lookups by URL are O(1) and a save only appends one line.
+
+    When `max_bytes` is set and exceeded, every snapshot no URL points to any
+    more is deleted, then the snapshots of the least recently saved URLs until
+    the archive fits; the index is then compacted to the live URLs, so the
+    objects it tracks are exactly the ones left on disk.
+
+    Compression is zstd when the zstandard package is installed, gzip otherwise.
+    `save_async` runs compression and disk writes in a worker thread.
+    """
+
+    def __init__(self, root: str, compression: Optional[str] = None, max_bytes: Optional[int] = None):
+        if compression is None:
+            compression = "zstd" if zstandard is not None else "gzip"
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression needs the zstandard package")
+        if compression not in ("zstd", "gzip"):
+            raise ValueError(f"Unsupported compression {compression!r}")
+        self.root = root
+        self.compression = compression
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        # url -> {"hash", "path", "saved_at"}; objects: hash -> {"path", "bytes"}
+        self.urls: Dict[str, Dict] = {}
+        self.objects: Dict[str, Dict] = {}
+        self._refs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._index_path = os.path.join(root, "index.jsonl")
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self._index_path):
+            return
+        with open(self._index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._apply(entry)
+
+    def _apply(self, entry: Dict):
+        digest = entry["hash"]
+        if digest not in self.objects:
+            self.objects[digest] = {"path": entry["path"], "bytes": entry["bytes"]}
+            self._refs[digest] = 0
+            self.total_bytes += entry["bytes"]
+        previous = self.urls.get(entry["url"])
+        if previous is not None:
+            self._refs[previous["hash"]] -= 1
+        self.urls[entry["url"]] = {"hash": digest, "path": entry["path"], "saved_at": entry["saved_at"]}
+        self._refs[digest] += 1
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=10).compress(data)
+        return gzip.compress(data, compresslevel=6)
+
+    def save(self, url: str, content: str) -> str:
+        """Stores the page's HTML for the URL and returns the snapshot path."""
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            existing = self.objects.get(digest)
+            if existing is None:
+                ext = "zst" if self.compression == "zstd" else "gz"
+                relative = os.path.join("objects", digest[:2], f"{digest}.html.{ext}")
+                path = os.path.join(self.root, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                compressed = self._compress(data)
+                with open(path, "wb") as f:
+                    f.write(compressed)
+                size = len(compressed)
+            else:
+                relative, size = existing["path"], existing["bytes"]
+
+            entry = {"url": url, "hash": digest, "path": relative, "bytes": size, "saved_at": datetime.now().isoformat()}
+            self._apply(entry)
+            with open(self._index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._enforce_retention(keep_url=url)
+        return os.path.join(self.root, relative)
+
+    async def save_async(self, url: str, content: str) -> str:
+        """save() on a worker thread, so the event loop never blocks on compression or disk."""
+        return await asyncio.to_thread(self.save, url, content)
+
+    def load(self, url: str) -> Optional[str]:
+        """Returns the latest HTML stored for the URL, or None."""
+        entry = self.urls.get(url)
+        if entry is None:
+            return None
+        return self.read_object(entry["path"])
+
+    def read_object(self, relative_path: str) -> str:
+        path = os.path.join(self.root, relative_path)
+        return read_snapshot(path)
+
+    def latest(self) -> Iterator[Tuple[str, str]]:
+        """Yields (url, snapshot path relative to root) for every URL's latest snapshot."""
+        for url, entry in list(self.urls.items()):
+            yield url, entry["path"]
+
+    def _enforce_retention(self, keep_url: str):
+        if self.max_bytes is None or self.total_bytes <= self.max_bytes:
+            return
+        # All of them, not just enough to fit: compaction drops them from the index
+        for digest in [d for d, refs in self._refs.items() if refs == 0]:
+            self._delete_object(digest)
+        if self.total_bytes > self.max_bytes:
+            for url in sorted(self.urls, key=lambda u: self.urls[u]["saved_at"]):
+                if self.total_bytes <= self.max_bytes:
+                    break
+                if url == keep_url:
+                    continue
+                digest = self.urls.pop(url)["hash"]
+                self._refs[digest] -= 1
+                if self._refs[digest] == 0:
+                    self._delete_object(digest)
+        self._compact_index()
+
+    def _delete_object(self, digest: str):
+        obj = self.objects.pop(digest)
+        del self._refs[digest]
+        self.total_bytes -= obj["bytes"]
+        try:
+            os.remove(os.path.join(self.root, obj["path"]))
+        except FileNotFoundError:
+            pass
+
+    def _compact_index(self):
+        """Rewrites the index with one line per live URL."""
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for url, entry in self.urls.items():
+                line = dict(entry, url=url, bytes=self.objects[entry["hash"]]["bytes"])
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self._index_path)
+
+
+_archives: Dict[str, HtmlArchive] = {}
+
+
+def get_archive(root: str, max_bytes: Optional[int] = None) -> HtmlArchive:
+    """
+    One shared archive per directory, so concurrent scrapes update a single index.
+    A max_bytes given here sets that archive's retention cap.
+    """
+    key = os.path.abspath(root)
+    if key not in _archives:
+        os.makedirs(root, exist_ok=True)
+        _archives[key] = HtmlArchive(root)
+    if max_bytes is not None:
+        _archives[key].max_bytes = max_bytes
+    return _archives[key]
@@ -0,0 +1,116 @@
+from typing import Any, Dict, List, Optional
+import soupsieve
+from bs4 import BeautifulSoup
+
+
+class ParserBackend:
+    """
+    Minimal interface the extractor needs from an HTML parser: parse a document,
+    compile CSS selectors into matchers once, run matchers against any node, and
+    read text and attributes. `text` must match BeautifulSoup's get_text(strip=True).
+    """
+
+    name = "base"
+
+    def parse(self, content: str) -> Any:
+        raise NotImplementedError
+
+    def compile(self, css: str) -> Any:
+        raise NotImplementedError
+
+    def select(self, node: Any, matcher: Any) -> List[Any]:
+        raise NotImplementedError
+
+    def select_one(self, node: Any, matcher: Any) -> Optional[Any]:
+        found = self.select(node, matcher)
+        return found[0] if found else None
+
+    def text(self, node: Any) -> str:
+        raise NotImplementedError
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        raise NotImplementedError
+
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup with soupsieve selectors, on top of any bs4 tree builder."""
+
+    def __init__(self, features: str = "html.parser"):
+        self.features = features
+        self.name = f"bs4:{features}"
+
+    def parse(self, content: str) -> Any:
+        return BeautifulSoup(content, self.features)
+
+    def compile(self, css: str) -> Any:
+        return soupsieve.compile(css)
+
+    def select(self, node: Any, matcher: Any) -> List[Any]:
+        return matcher.select(node)
+
+    def select_one(self, node: Any, matcher: Any) -> Optional[Any]:
+        return matcher.select_one(node)
+
+    def text(self, node: Any) -> str:
+        return node.get_text(strip=True)
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+class LxmlBackend(ParserBackend):
+    """lxml.html with cssselect; needs the lxml and cssselect packages."""
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+        self._fromstring = lxml.html.fromstring
+        self._selector = CSSSelector
+
+    def parse(self, content: str) -> Any:
+        try:
+            return self._fromstring(content)
+        except ValueError:
+            # lxml refuses str input that carries an XML encoding declaration
+            return self._fromstring(content.encode("utf-8"))
+
+    def compile(self, css: str) -> Any:
+        # The CSS is translated to XPath once here instead of on every query
+        return self._selector(css, translator="html")
+
+    def select(self, node: Any, matcher: Any) -> List[Any]:
+        return matcher(node)
+
+    def text(self, node: Any) -> str:
+        return "".join(piece.strip() for piece in node.xpath(".//text()"))
+
+    def attr(self, node: Any, name: str) -> Optional[str]:
+        return node.get(name)
+
+
+BACKENDS = {
+    "html.parser": lambda: SoupBackend("html.parser"),
+    "bs4-lxml": lambda: SoupBackend("lxml"),
+    "lxml": LxmlBackend,
+}
+
+_instances: Dict[str, ParserBackend] = {}
+
+
+def get_backend(name: Optional[str] = None) -> ParserBackend:
+    """
+    Returns a shared backend instance by name. Without a name, uses lxml when it
+    is installed and falls back to BeautifulSoup's html.parser otherwise.
+    """
+    if name is None:
+        try:
+            return get_backend("lxml")
+        except ImportError:
+            return get_backend("html.parser")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown parser backend {name!r}; choose from {sorted(BACKENDS)}")
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
@@ -0,0 +1,131 @@
+import asyncio
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import httpx
+from extraction_profiles import read_profile, site_for_url
+from product_parser import extract_embedded_product, extract_product_details
+from rate_limiter import HostRateLimiter, get_rate_limiter
+
+# Keys extract_product_details sets itself; every other key it returns is a detail section (Size, Materials, ...)
+BASE_FIELDS = ("url", "product_name", "price", "Editor's Notes", "Images", "Reviews", "fetch_path")
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+        "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+    ),
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+class HttpFetcher:
+    """
+    Pooled async HTTP client for fetching product pages without a browser.
+    Connections are kept alive and reused across requests to the same host, and every
+    request is paced by the host's adaptive rate limit (the shared one unless given).
+
+    Usage:
+        async with HttpFetcher() as fetcher:
+            response = await fetcher.get(url)
+    """
+
+    def __init__(self, max_connections: int = 20, timeout: float = 20.0, rate_limiter: Optional[HostRateLimiter] = None):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "HttpFetcher":
+        self._client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            follow_redirects=True,
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._client.aclose()
+        self._client = None
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        async with self.rate_limiter.limit(url) as request:
+            response = await self._client.get(url, headers=headers)
+            request["status"] = response.status_code
+        return response
+
+
+def extract_from_html(content: str, url: str) -> Dict:
+    """Extracts a product from server-rendered HTML, filling gaps from its embedded JSON-LD."""
+    product = extract_product_details(content, url)
+    for field, value in extract_embedded_product(content, url).items():
+        if not product.get(field):
+            product[field] = value
+    return product
+
+
+@lru_cache(maxsize=None)
+def required_fields(site: str) -> Tuple[str, ...]:
+    """
+    Fields a browserless product must have to be accepted, from the product
+    profile's "required_fields": the fields the browser path extracts, where
+    "detail_sections" stands for at least one detail section.
+    """
+    return tuple(read_profile("product", site)["required_fields"])
+
+
+def missing_fields(product: Dict, url: str) -> List[str]:
+    missing = []
+    for field in required_fields(site_for_url(url)):
+        if field == "detail_sections":
+            if not any(key not in BASE_FIELDS for key in product):
+                missing.append(field)
+        elif not product.get(field):
+            missing.append(field)
+    return missing
+
+
+async def try_http_extraction(fetcher: HttpFetcher, url: str) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Fetches the page over plain HTTP and extracts it from the server-rendered HTML,
+    filling gaps from the embedded JSON-LD product data.
+
+    Returns (product, html). The product is None when the request failed or any
+    field the browser path would extract is missing (see required_fields), meaning
+    the caller should fall back to the browser. JSON-LD alone never makes a page
+    complete: it has no detail sections, Editor's Notes or reviews.
+    """
+    try:
+        response = await fetcher.get(url)
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        print(f"HTTP fast path failed for {url}: {e}")
+        return None, None
+
+    content = response.text
+    # Parsing is CPU-bound; keep it off the event loop like the browser path's parsing
+    product = await asyncio.to_thread(extract_from_html, content, url)
+
+    missing = missing_fields(product, url)
+    if missing:
+        print(f"HTTP fast path missing {missing} for {url}, falling back to browser")
+        return None, content
+    return product, content
+
+
+def summarize_fetch_paths(products: List[Dict]) -> Dict:
+    """Counts products per fetch_path and the share served without a browser."""
+    counts: Dict[str, int] = {}
+    for product in products:
+        path = product.get("fetch_path", "unknown")
+        counts[path] = counts.get(path, 0) + 1
+    total = len(products)
+    return {
+        "total": total,
+        "by_path": counts,
+        "browserless_fraction": round(counts.get("http", 0) / total, 3) if total else None,
+    }
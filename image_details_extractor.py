@@ -1,9 +1,18 @@
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+import argparse
+import asyncio
+import collections
 import os
+import time
+import weakref
 from pathlib import Path
 import json
 import base64
+from typing import AsyncIterator, Deque, Dict, Iterable, Optional, Tuple
+import httpx
 from dotenv import load_dotenv
+from jsonl_io import JsonlWriter, iter_products
+from llm_cache import get_response_cache, response_cache_key
 
 load_dotenv()
 
@@ -11,10 +20,27 @@ client = OpenAI(
     api_key=os.getenv("OPENAI_API_KEY"),
 )
 
-def generate_product_description(image_file_paths):
+# Model, instructions and temperature of the multimodal product analysis; all part of the cache key
+DESCRIPTION_MODEL = "gpt-4.1"
+DESCRIPTION_TEMPERATURE = 0.2
+DESCRIPTION_INSTRUCTIONS = (
+    "You are a luxury fashion product analyst. Based on the above images, "
+    "provide a detailed JSON output that includes:\n"
+    "1. Product name (if identifiable) or suggested generic name.\n"
+    "2. Materials and fabrics with texture details.\n"
+    "3. Aesthetic style, unique elements (e.g., modern minimalist, classic vintage).\n"
+    "4. Color palette and design motifs.\n"
+    "5. Possible brand heritage or historical influences if recognizable.\n"
+    "6. Suggested use-case or styling recommendations.\n"
+    "7. Any notable craftsmanship techniques visible.\n"
+    "Format the output strictly as JSON with keys matching the above points and no extra commentary."
+)
+
+
+def build_description_content(image_file_paths):
     """
-    Given a list of image file paths or URLs, send multiple images to Mistral Pixtral-12B
-    for a detailed product description in JSON format.
+    Builds the multimodal message content for a list of image file paths or URLs:
+    each image labelled and attached (local files Base64-encoded), then the instructions.
     """
     # Ensure input is a non-empty list
     assert isinstance(image_file_paths, list) and image_file_paths, "Provide a non-empty list of image paths or URLs"
@@ -42,23 +68,14 @@ def generate_product_description(image_file_paths):
             message_content.append({"type": "image_url", "image_url": {"url": base64_data_url}})
 
     # Append a final TextChunk with instructions for description
-    instruction_text = (
-        "You are a luxury fashion product analyst. Based on the above images, "
-        "provide a detailed JSON output that includes:\n"
-        "1. Product name (if identifiable) or suggested generic name.\n"
-        "2. Materials and fabrics with texture details.\n"
-        "3. Aesthetic style, unique elements (e.g., modern minimalist, classic vintage).\n"
-        "4. Color palette and design motifs.\n"
-        "5. Possible brand heritage or historical influences if recognizable.\n"
-        "6. Suggested use-case or styling recommendations.\n"
-        "7. Any notable craftsmanship techniques visible.\n"
-        "Format the output strictly as JSON with keys matching the above points and no extra commentary."
-    )
-    message_content.append({"type": "text", "text": instruction_text})
+    message_content.append({"type": "text", "text": DESCRIPTION_INSTRUCTIONS})
+    return message_content
+
 
-    # Call to the Mistral Pixtral model
-    chat_response = client.chat.completions.create(
-        model="gpt-4.1",
+def description_request(message_content) -> Dict:
+    """Keyword arguments for chat.completions.create, shared by the sync and async clients."""
+    return dict(
+        model=DESCRIPTION_MODEL,
         messages=[
             {
                 "role": "user",
@@ -66,21 +83,195 @@ def generate_product_description(image_file_paths):
             }
         ],
         response_format={"type": "json_object"},
-        temperature=0.2,
+        temperature=DESCRIPTION_TEMPERATURE,
     )
 
-    # Parse and save the JSON response
-    response_dict = json.loads(chat_response.choices[0].message.content)
 
-    # Persist the result to a file
+def description_cache_key(image_file_paths) -> str:
+    """Response-cache key of an analysis: the image set (in any order), model, instructions and temperature."""
+    return response_cache_key(image_file_paths, DESCRIPTION_MODEL, DESCRIPTION_INSTRUCTIONS, DESCRIPTION_TEMPERATURE)
+
+
+def cached_description(image_file_paths):
+    """(cache key, cached description or None); (None, None) when caching is off."""
+    cache = get_response_cache()
+    if cache is None:
+        return None, None
+    key = description_cache_key(image_file_paths)
+    return key, cache.get(key)
+
+
+def cache_description(key: Optional[str], response_dict: Dict):
+    if key is not None:
+        get_response_cache().set(key, response_dict)
+
+
+def save_description(response_dict: Dict):
+    """Persists the latest description to image_analysis_output/product_description.json."""
     output_path = Path("image_analysis_output")
     output_path.mkdir(exist_ok=True)
     output_file = output_path / "product_description.json"
     with open(output_file, "w") as json_file:
         json.dump(response_dict, json_file, indent=4)
 
+
+def generate_product_description(image_file_paths):
+    """
+    Given a list of image file paths or URLs, send multiple images to the model
+    for a detailed product description in JSON format.
+    Blocks until the model answers; use generate_product_description_async in async code.
+    Answers are kept in the response cache (see llm_cache), so the same image
+    set is only ever sent once.
+    """
+    key, response_dict = cached_description(image_file_paths)
+    if response_dict is None:
+        message_content = build_description_content(image_file_paths)
+
+        chat_response = client.chat.completions.create(**description_request(message_content))
+
+        # Parse and cache the JSON response
+        response_dict = json.loads(chat_response.choices[0].message.content)
+        cache_description(key, response_dict)
+    save_description(response_dict)
+    return response_dict
+
+
+# One AsyncOpenAI client per event loop: its pooled connections belong to the loop that opened them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+# Analyses in flight per event loop by cache key, so variants sharing images in one batch make one call
+_in_flight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client(max_connections: int = 20) -> AsyncOpenAI:
+    """
+    The shared AsyncOpenAI client of the running event loop. Its connection pool
+    keeps up to `max_connections` connections to the API alive between calls, so
+    concurrent and back-to-back analyses skip the TCP/TLS handshake.
+    """
+    loop = asyncio.get_running_loop()
+    async_client = _async_clients.get(loop)
+    if async_client is None:
+        async_client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                    keepalive_expiry=60,
+                ),
+                timeout=httpx.Timeout(120.0, connect=10.0),
+            ),
+        )
+        _async_clients[loop] = async_client
+    return async_client
+
+
+async def close_async_client():
+    """Closes the running event loop's shared client; call before the loop ends (e.g. at the end of asyncio.run)."""
+    async_client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if async_client is not None:
+        await async_client.close()
+
+
+async def generate_product_description_async(image_file_paths, async_client: Optional[AsyncOpenAI] = None):
+    """
+    generate_product_description on the pooled async client (see get_async_client),
+    so the event loop keeps running while the model works and many products'
+    analyses can be in flight at once. Uses the same response cache, and an
+    image set already being analysed on this loop waits for that answer
+    instead of sending a second request.
+    """
+    # Hashing local images and the cache lookup are blocking work
+    key, response_dict = await asyncio.to_thread(cached_description, image_file_paths)
+    if response_dict is None:
+        if key is None:
+            response_dict = await _request_description(image_file_paths, key, async_client)
+        else:
+            in_flight = _in_flight.setdefault(asyncio.get_running_loop(), {})
+            if key not in in_flight:
+                in_flight[key] = asyncio.ensure_future(_request_description(image_file_paths, key, async_client))
+                in_flight[key].add_done_callback(lambda future: _forget_request(in_flight, key, future))
+            # Shielded: one caller being cancelled must not cancel the request for the others
+            response_dict = await asyncio.shield(in_flight[key])
+    save_description(response_dict)
+    return response_dict
+
+
+def _forget_request(in_flight: Dict[str, asyncio.Future], key: str, future: asyncio.Future):
+    in_flight.pop(key, None)
+    # Every caller may have been cancelled meanwhile; don't warn about an error nobody awaited
+    if not future.cancelled():
+        future.exception()
+
+
+async def _request_description(image_file_paths, key: Optional[str], async_client: Optional[AsyncOpenAI]) -> Dict:
+    # Reading and encoding local images is blocking file work
+    message_content = await asyncio.to_thread(build_description_content, image_file_paths)
+
+    async_client = async_client or get_async_client()
+    chat_response = await async_client.chat.completions.create(**description_request(message_content))
+
+    response_dict = json.loads(chat_response.choices[0].message.content)
+    await asyncio.to_thread(cache_description, key, response_dict)
     return response_dict
 
+
+async def describe_products(products: Iterable[Dict], concurrency: int = 8) -> AsyncIterator[Tuple[Dict, Dict]]:
+    """
+    Yields (product, description) for every product in input order, with up to
+    `concurrency` image analyses in flight. Products are read from the iterable
+    only as fast as they are consumed, so a streamed .jsonl input stays streamed.
+    Products without images get an empty description without an API call.
+    """
+    async def describe(product: Dict) -> Dict:
+        images = product.get("Images", [])
+        return await generate_product_description_async(images) if images else {}
+
+    window: Deque[Tuple[Dict, asyncio.Task]] = collections.deque()
+    try:
+        for product in products:
+            window.append((product, asyncio.ensure_future(describe(product))))
+            if len(window) >= concurrency:
+                product, task = window.popleft()
+                yield product, await task
+        while window:
+            product, task = window.popleft()
+            yield product, await task
+    finally:
+        # Stopped early (an analysis failed or the consumer quit): drop the rest quietly
+        for _, task in window:
+            if task.done() and not task.cancelled():
+                task.exception()
+            else:
+                task.cancel()
+
+
+async def _describe_file(input_path: str, output_path: str, concurrency: int):
+    try:
+        with JsonlWriter(output_path) as writer:
+            async for product, description in describe_products(iter_products(input_path), concurrency):
+                product["Product Description"] = description
+                writer.write(product)
+                print(f"Described {writer.count}: {product.get('url', '')}")
+    finally:
+        await close_async_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate image-based product descriptions for a product file.")
+    parser.add_argument("input", help="Products as a JSON array or JSON Lines file")
+    parser.add_argument("-o", "--output", default="products_described.jsonl")
+    parser.add_argument("--concurrency", type=int, default=8, help="Image analyses in flight at once")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    asyncio.run(_describe_file(args.input, args.output, args.concurrency))
+    print(f"Descriptions saved to {args.output} in {time.perf_counter() - start:.1f}s")
+    cache = get_response_cache()
+    if cache is not None:
+        print(f"Response cache: {cache.stats()}")
+
+
 # Example usage:
 # if __name__ == "__main__":
 #     images = [
@@ -94,3 +285,7 @@ def generate_product_description(image_file_paths):
 #     ]
 #     description = generate_product_description(images)
 #     print(json.dumps(description, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+
+class JsonlWriter:
+    """
+    Appends one JSON object per line and flushes after every write, so readers
+    (including follow_jsonl in another process) see each product as soon as it
+    is written and memory use does not grow with the number of products.
+
+    Usage:
+        with JsonlWriter("products.jsonl") as writer:
+            writer.write(product)
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.append = append
+        self.count = 0
+        self._file = None
+
+    def __enter__(self) -> "JsonlWriter":
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a" if self.append else "w", encoding="utf-8")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._file.close()
+        self._file = None
+
+    def write(self, obj: Any):
+        self._file.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.count += 1
+
+
+def iter_jsonl(path: str) -> Iterator[Dict]:
+    """
+    Lazily yields each object in a JSON Lines file. Blank lines and a torn
+    final line (from a writer that is still running or was interrupted) are skipped.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def follow_jsonl(path: str, idle_timeout: float = 30.0, poll_interval: float = 0.5) -> Iterator[Dict]:
+    """
+    Yields objects from a JSON Lines file while another process is still writing it,
+    like `tail -f`. Stops once no new complete line has appeared for idle_timeout seconds.
+    """
+    while not os.path.exists(path):
+        time.sleep(poll_interval)
+    with open(path, "r", encoding="utf-8") as f:
+        buffer = ""
+        last_seen = time.monotonic()
+        while True:
+            chunk = f.readline()
+            if chunk:
+                buffer += chunk
+                if buffer.endswith("\n"):
+                    if buffer.strip():
+                        yield json.loads(buffer)
+                    buffer = ""
+                    last_seen = time.monotonic()
+                continue
+            if time.monotonic() - last_seen > idle_timeout:
+                return
+            time.sleep(poll_interval)
+
+
+def count_jsonl(path: str) -> int:
+    """Counts non-blank lines without parsing them."""
+    with open(path, "r", encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def iter_products(path: str) -> Iterator[Dict]:
+    """
+    Iterates products from either a .jsonl file (lazily) or a legacy JSON array file
+    (which has to be loaded whole).
+    """
+    if path.endswith(".jsonl"):
+        yield from iter_jsonl(path)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        yield from json.load(f)
+
+
+def write_json_array(items: Iterable[Any], path: str, indent: Optional[int] = 4):
+    """
+    Streams items into a JSON array file one at a time. The output is byte-for-byte what
+    json.dump(list(items), f, indent=indent, ensure_ascii=False) would write, without
+    holding the list in memory.
+    """
+    pad = " " * indent if indent else ""
+    newline = "\n" if indent else ""
+    separator = "," + newline if indent else ", "
+    with open(path, "w", encoding="utf-8") as f:
+        first = True
+        for item in items:
+            encoded = json.dumps(item, indent=indent, ensure_ascii=False)
+            if indent:
+                encoded = "\n".join(pad + line for line in encoded.split("\n"))
+            f.write(("[" + newline if first else separator) + encoded)
+            first = False
+        f.write("[]" if first else newline + "]")
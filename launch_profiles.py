@@ -0,0 +1,159 @@
+import os
+import tempfile
+from typing import IO, Dict, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows locks with msvcrt instead
+    fcntl = None
+    import msvcrt
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    load_dotenv = None
+
+# BROWSER_PROFILE can also be set in the .env file
+if load_dotenv is not None:
+    load_dotenv()
+
+# Chromium switches that drop work a scraper never needs (GPU compositing,
+# extensions, background services) and keep pages that are not in front from
+# being throttled, since a pool loads several at once
+LIGHTWEIGHT_ARGS = [
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-component-extensions-with-background-pages",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-dev-shm-usage",
+    "--mute-audio",
+    "--no-first-run",
+]
+
+# Environment variable that selects the launch profile, e.g. BROWSER_PROFILE=debug
+PROFILE_ENV = "BROWSER_PROFILE"
+DEFAULT_PROFILE = "production"
+
+
+class LaunchProfile:
+    """
+    How BrowserPool launches Chromium and sets up its contexts.
+
+    - `headless`: run without a window (no display needed, nothing painted on screen).
+    - `args`: extra Chromium command-line switches.
+    - `viewport`: page size in CSS pixels; smaller pages lay out and paint less.
+    - `cache_dir`: when set, each pool browser keeps its HTTP disk cache under
+      this directory, so scripts and stylesheets are reused across browser
+      recycles and across runs. Each running browser locks one `cache-N`
+      subdirectory for itself (see claim_disk_cache), so other pools in the
+      same process and other scraper processes take a free one instead of
+      colliding. Only the HTTP cache is kept: Chromium only uses a disk cache
+      in a persistent profile, so the first context of each browser is
+      launched as one, but in a throwaway profile directory that is deleted
+      when the browser closes. Cookies, localStorage and other site state are
+      therefore never carried from one browser or run to the next.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        headless: bool = True,
+        args: Optional[List[str]] = None,
+        viewport: Optional[Dict[str, int]] = None,
+        cache_dir: Optional[str] = None,
+    ):
+        self.name = name
+        self.headless = headless
+        self.args = list(args or [])
+        self.viewport = viewport
+        self.cache_dir = cache_dir
+
+    def launch_options(self) -> Dict:
+        return {"headless": self.headless, "args": self.args}
+
+    def context_options(self) -> Dict:
+        if self.viewport is None:
+            return {}
+        return {"viewport": self.viewport, "device_scale_factor": 1}
+
+    def claim_disk_cache(self, max_dirs: int = 64) -> Optional["DiskCacheLease"]:
+        """Locks the first free cache directory, or returns None when caching is off or all are in use."""
+        if self.cache_dir is None:
+            return None
+        for n in range(max_dirs):
+            lease = DiskCacheLease.try_claim(os.path.join(self.cache_dir, f"cache-{n}"))
+            if lease is not None:
+                return lease
+        return None
+
+    def __repr__(self) -> str:
+        return f"LaunchProfile({self.name!r}, headless={self.headless}, cache_dir={self.cache_dir!r})"
+
+
+class DiskCacheLease:
+    """
+    Exclusive use of one disk cache directory, held through an OS lock on a
+    file inside it until release(). The lock goes away with the process, so a
+    crashed scraper never leaves a directory claimed.
+    """
+
+    def __init__(self, path: str, lock_file: IO):
+        self.path = path
+        self._lock_file = lock_file
+
+    @classmethod
+    def try_claim(cls, path: str) -> Optional["DiskCacheLease"]:
+        os.makedirs(path, exist_ok=True)
+        lock_file = open(os.path.join(path, ".lock"), "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return None
+        return cls(path, lock_file)
+
+    def launch_args(self) -> List[str]:
+        return [f"--disk-cache-dir={self.path}"]
+
+    def release(self):
+        if not self._lock_file.closed:
+            # Closing the file drops the lock
+            self._lock_file.close()
+
+
+LAUNCH_PROFILES: Dict[str, LaunchProfile] = {
+    # Unattended crawling: headless, lightweight switches, a small viewport and a cache kept across runs
+    "production": LaunchProfile(
+        "production",
+        headless=True,
+        args=LIGHTWEIGHT_ARGS,
+        viewport={"width": 1280, "height": 720},
+        cache_dir=os.path.join(tempfile.gettempdir(), "scraper_browser_cache"),
+    ),
+    # Chromium's defaults without a window, as a baseline for benchmarks
+    "headless": LaunchProfile("headless", headless=True),
+    # A visible browser window, for watching or debugging a crawl
+    "debug": LaunchProfile("debug", headless=False),
+}
+
+
+def get_launch_profile(profile: Union[LaunchProfile, str, None] = None) -> LaunchProfile:
+    """
+    Resolves a profile given by name (or as is); None means the one named by the
+    BROWSER_PROFILE environment variable, and "production" when that is unset.
+    """
+    if isinstance(profile, LaunchProfile):
+        return profile
+    name = profile or os.getenv(PROFILE_ENV) or DEFAULT_PROFILE
+    if name not in LAUNCH_PROFILES:
+        raise ValueError(f"Unknown browser launch profile {name!r}; expected one of {sorted(LAUNCH_PROFILES)}")
+    return LAUNCH_PROFILES[name]
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from browser_pool import BrowserPool
+from jsonl_io import JsonlWriter
+from link_grabber import scrape_product_links
+
+
+class UrlFrontier:
+    """
+    Product URLs to crawl, in discovery order, each with the category listings it was found on.
+
+    URLs are expected to be normalized already (see normalize_product_url), so a
+    product listed under several categories is one entry with several sources.
+    Backed by a dict, so adding and membership checks are O(1).
+    """
+
+    def __init__(self):
+        self._categories: Dict[str, List[str]] = {}
+
+    def add(self, url: str, category: str) -> bool:
+        """Records that `category` lists `url`; True when the URL is new to the frontier."""
+        categories = self._categories.get(url)
+        if categories is None:
+            self._categories[url] = [category]
+            return True
+        if category not in categories:
+            categories.append(category)
+        return False
+
+    def __len__(self) -> int:
+        return len(self._categories)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._categories
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._categories)
+
+    def urls(self) -> List[str]:
+        return list(self._categories)
+
+    def categories(self, url: str) -> List[str]:
+        return list(self._categories.get(url, []))
+
+    def entries(self) -> Iterator[Dict]:
+        for url, categories in self._categories.items():
+            yield {"url": url, "categories": list(categories)}
+
+    def save(self, path: str) -> int:
+        """Writes one {"url": ..., "categories": [...]} line per URL and returns the count."""
+        with JsonlWriter(path) as writer:
+            for entry in self.entries():
+                writer.write(entry)
+            return writer.count
+
+
+async def discover_product_links(
+    category_urls: Iterable[str],
+    pool: Optional[BrowserPool] = None,
+    concurrency: int = 3,
+    mode: str = "auto",
+) -> UrlFrontier:
+    """
+    Crawls every category listing, `concurrency` at a time, and merges their
+    product URLs into one UrlFrontier. The merge follows the order of
+    `category_urls` rather than completion order, so the frontier is the same
+    from run to run. A category that fails is reported and skipped.
+    """
+    category_urls = list(dict.fromkeys(category_urls))
+    if pool is None:
+        async with BrowserPool(size=1) as own_pool:
+            return await discover_product_links(category_urls, own_pool, concurrency, mode)
+
+    limit = asyncio.Semaphore(concurrency)
+
+    async def crawl(category_url: str) -> List[str]:
+        async with limit:
+            start = time.perf_counter()
+            try:
+                links = await scrape_product_links(category_url, pool, mode)
+            except Exception as e:
+                print(f"Error discovering links on {category_url}: {e}")
+                return []
+            print(f"{category_url}: {len(links)} product links in {time.perf_counter() - start:.1f}s")
+            return links
+
+    found = await asyncio.gather(*(crawl(category_url) for category_url in category_urls))
+
+    frontier = UrlFrontier()
+    listed = 0
+    for category_url, links in zip(category_urls, found):
+        listed += len(links)
+        for url in links:
+            frontier.add(url, category_url)
+    print(f"Discovered {len(frontier)} unique products from {len(category_urls)} categories "
+          f"({listed - len(frontier)} cross-category duplicates)")
+    return frontier
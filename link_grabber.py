@@ -1,87 +1,242 @@
 import asyncio
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
-
-async def scrape_product_links(url: str) -> list:
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        page = await browser.new_page()
-        
-        # Navigate to URL
-        await page.goto(url, wait_until="domcontentloaded")
+import json
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlsplit, urlunparse, urlunsplit
+from playwright.async_api import Page, Response, TimeoutError as PlaywrightTimeoutError
+from browser_pool import BrowserPool
+from extraction_profiles import profile_for_url, read_profile, site_for_url
+from rate_limiter import get_rate_limiter, paced_goto
+from scroll_engine import ScrollEngine
+
+
+def is_product_href(href: Optional[str]) -> bool:
+    # Skip non-product links
+    return bool(href) and "/products/" in href and "/products/c" not in href
+
+
+def normalize_product_url(url: str, keep_params: Iterable[str] = ()) -> str:
+    """
+    Canonical form of a product URL, so the same product reached through
+    different listings or tracking links is only crawled once: lower-case
+    scheme and host, no fragment, and no query parameters except `keep_params`
+    (e.g. "/products/x/CW917.html?rrec=true" -> "/products/x/CW917.html").
+    """
+    if "?" not in url and "#" not in url:
+        # Already canonical unless the scheme or host has upper-case letters (the common case, kept cheap)
+        host_end = url.find("/", url.find("//") + 2)
+        origin = url[:host_end] if host_end != -1 else url
+        if origin == origin.lower():
+            return url
+    parts = urlsplit(url)
+    query = ""
+    if parts.query:
+        query = urlencode(sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name in keep_params))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, query, ""))
+
+
+def product_urls_from_json(data, base_url: str, keep_params: Iterable[str] = ()) -> List[str]:
+    """Every product URL (absolute or site-relative) found anywhere in a JSON payload, normalized, in document order."""
+    found: Dict[str, None] = {}
+
+    def walk(value):
+        if isinstance(value, dict):
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+        elif isinstance(value, str) and value.startswith(("/", "http")) and is_product_href(value):
+            found[normalize_product_url(urljoin(base_url, value), keep_params)] = None
+
+    walk(data)
+    return list(found)
+
+
+def next_page_url(endpoint: str, page_size: int, api_config: Dict) -> Optional[str]:
+    """
+    The listing endpoint's next page: its offset parameter advanced by one page,
+    or else its page-number parameter advanced by one. None when the endpoint
+    has neither, i.e. it cannot be paged.
+    """
+    parts = urlparse(endpoint)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    names = [name for name, _ in query]
+    for name, value in query:
+        if name in api_config["size_params"] and value.isdigit():
+            page_size = int(value)
+
+    for kind in ("offset_params", "page_params"):
+        for param in api_config[kind]:
+            if param in names:
+                step = page_size if kind == "offset_params" else 1
+                query = [(n, str(int(v) + step) if n == param and v.isdigit() else v) for n, v in query]
+                return urlunparse(parts._replace(query=urlencode(query)))
+    return None
+
+
+class ListingCapture:
+    """
+    Collects product URLs from the XHR/fetch JSON responses a listing page makes
+    while it loads, and remembers which endpoint returned the most products so
+    it can be paged directly afterwards.
+    """
+
+    def __init__(self, base_url: str, keep_params: Iterable[str] = ()):
+        self.base_url = base_url
+        self.keep_params = tuple(keep_params)
+        self.urls: Dict[str, None] = {}
+        self.endpoint: Optional[str] = None
+        self.endpoint_size = 0
+        self.api_responses = 0
+        self._pending: List[asyncio.Task] = []
+
+    def on_response(self, response: Response):
+        if response.request.resource_type in ("xhr", "fetch"):
+            self._pending.append(asyncio.ensure_future(self._read(response)))
+
+    async def _read(self, response: Response):
+        if "json" not in (response.headers.get("content-type") or ""):
+            return
+        try:
+            data = await response.json()
+        except Exception:
+            return
+        self.add(response.url, data)
+
+    def add(self, endpoint: str, data) -> int:
+        """Records one JSON payload and returns how many new product URLs it had."""
+        urls = product_urls_from_json(data, self.base_url, self.keep_params)
+        if not urls:
+            return 0
+        self.api_responses += 1
+        if len(urls) > self.endpoint_size:
+            self.endpoint, self.endpoint_size = endpoint, len(urls)
+        new = [url for url in urls if url not in self.urls]
+        self.urls.update(dict.fromkeys(new))
+        return len(new)
+
+    async def settle(self):
+        """Waits for responses that are still being read."""
+        while self._pending:
+            pending, self._pending = self._pending, []
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def page_listing_endpoint(page: Page, capture: ListingCapture, api_config: Dict) -> int:
+    """
+    Requests the captured listing endpoint page after page, in the page's own
+    browser context (same cookies and headers) and paced by the host's rate limit,
+    until a page adds no new products. Returns the number of pages fetched.
+    """
+    limiter = get_rate_limiter()
+    endpoint = capture.endpoint
+    pages = 0
+    while pages < api_config["max_pages"]:
+        endpoint = next_page_url(endpoint, capture.endpoint_size, api_config)
+        if endpoint is None:
+            break
+        async with limiter.limit(endpoint) as request:
+            response = await page.request.get(endpoint)
+            request["status"] = response.status
+        if not response.ok:
+            print(f"Listing endpoint returned {response.status} for {endpoint}")
+            break
+        try:
+            data = json.loads(await response.text())
+        except ValueError:
+            break
+        pages += 1
+        if capture.add(endpoint, data) == 0:
+            break
+    return pages
+
+
+async def scrape_product_links(url: str, pool: Optional[BrowserPool] = None, mode: str = "auto") -> list:
+    """
+    Returns the unique product URLs of a category listing page. The page is taken
+    from the given browser pool, or from a one-off pool when none is given.
+
+    mode "network" reads product URLs from the JSON responses the listing page
+    fetches while loading and then pages through that listing endpoint directly
+    (see ListingCapture); "scroll" scrolls the page until no more product tiles
+    load (see ScrollEngine); "auto" (the default) uses the network mode and falls
+    back to scrolling when the page made no API call that returned product URLs,
+    or when paging through that endpoint added no products beyond what the page
+    loaded itself (an unrelated JSON call, or an endpoint that cannot be paged).
+    """
+    if pool is None:
+        async with BrowserPool(size=1) as own_pool:
+            return await scrape_product_links(url, own_pool, mode)
+
+    profile = profile_for_url(url, "listing")
+    tile_css = profile.css("product_tile")
+    listing_config = read_profile("listing", site_for_url(url))
+    api_config = listing_config["listing_api"]
+    # Query parameters that select a different product rather than track the click
+    keep_params = listing_config.get("keep_query_params", [])
+
+    async with pool.page() as page:
+        capture = ListingCapture(url, keep_params)
+        if mode != "scroll":
+            page.on("response", capture.on_response)
+
+        # Navigate to URL, paced by the host's rate limit
+        await paced_goto(page, url, wait_until="domcontentloaded")
         print(f"Final URL: {page.url}")
+        capture.base_url = page.url
 
         # Wait for initial content
-        await page.wait_for_selector('.product-tile', timeout=15000)
-
-        # Scroll incrementally to avoid footer
-        scroll_count = 0
-        max_scrolls = 100
-        last_count = 0
-        same_count = 0
-        scroll_step = 800  # Pixels to scroll each time
-        
-        while scroll_count < max_scrolls:
-            # Get current product count before scrolling
-            current_products = await page.query_selector_all('.product-tile')
-            current_count = len(current_products)
-            
-            # Scroll incrementally (not to the very bottom)
-            await page.evaluate(f"window.scrollBy(0, {scroll_step})")
-            await asyncio.sleep(2.5)  # Increased wait time for loading
-            
-            # Check if new products loaded
-            new_products = await page.query_selector_all('.product-tile')
-            new_count = len(new_products)
-            
-            # Break conditions
-            if new_count == current_count:
-                same_count += 1
-                if same_count >= 4:  # Break if no new products after 4 scrolls
-                    print("No new products detected. Stopping scroll.")
-                    break
-            else:
-                same_count = 0
-                print(f"Scroll {scroll_count+1}: Products increased from {current_count} to {new_count}")
-            
-            # Check if we've reached the footer
-            is_at_bottom = await page.evaluate("""() => {
-                return window.innerHeight + window.scrollY >= document.body.scrollHeight - 100
-            }""")
-            
-            if is_at_bottom:
-                print("Reached bottom of page. Stopping scroll.")
-                break
-                
-            scroll_count += 1
-
-        # Final product count
-        final_products = await page.query_selector_all('.product-tile')
-        print(f"\nTotal products loaded: {len(final_products)}")
+        await page.wait_for_selector(tile_css, timeout=15000)
+
+        if mode != "scroll":
+            # Let the listing's first API calls finish
+            try:
+                await page.wait_for_load_state("networkidle", timeout=api_config["idle_timeout"] * 1000)
+            except PlaywrightTimeoutError:
+                pass
+            await capture.settle()
+
+        scroll = mode == "scroll"
+        if capture.endpoint is not None:
+            loaded = len(capture.urls)
+            pages = await page_listing_endpoint(page, capture, api_config)
+            print(f"Listing API: {len(capture.urls)} products from {capture.api_responses} responses "
+                  f"({pages} pages requested from {urlparse(capture.endpoint).path})")
+            if mode == "auto" and len(capture.urls) == loaded:
+                print("Listing API paging added no products, falling back to scrolling")
+                scroll = True
+        elif mode == "network":
+            print("No listing API responses seen")
+        else:
+            print("No listing API responses seen, falling back to scrolling")
+            scroll = True
+        if scroll:
+            await ScrollEngine(**listing_config.get("scroll", {})).run(page, tile_css)
 
         # Get HTML and parse
         content = await page.content()
-        await browser.close()
-
-        soup = BeautifulSoup(content, "html.parser")
-        product_links = []
-        
-        for link in soup.select('a[href^="/products/"]'):
-            href = link["href"]
-            # Skip non-product links
-            if "/products/" not in href or "/products/c" in href:
-                continue
-                
-            full_url = f"https://www.coach.com{href}"
-            if full_url not in product_links:
-                product_links.append(full_url)
-                
-        return product_links
+
+    backend = profile.backend
+    root = backend.parse(content)
+    # Insertion-ordered set of normalized URLs
+    product_links: Dict[str, None] = {}
+
+    for link in backend.select(root, profile["product_link"]):
+        href = backend.attr(link, "href")
+        if not is_product_href(href):
+            continue
+        product_links.setdefault(normalize_product_url(urljoin(capture.base_url, href), keep_params))
+
+    # Products that only came from the listing API go after the ones rendered on the page
+    for full_url in capture.urls:
+        product_links.setdefault(full_url)
+
+    return list(product_links)
 
 # if __name__ == "__main__":
 #     target_url = "https://www.coach.com/shop/women/view-all"
 #     links = asyncio.run(scrape_product_links(target_url))
-    
+
 #     print(f"\nFound {len(links)} unique product links:")
 #     for link in links:
-#         print(link)
\ No newline at end of file
+#         print(link)
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# LLM_CACHE selects the backend: a SQLite file path (the default), a redis:// URL, or "off"
+CACHE_ENV = "LLM_CACHE"
+DEFAULT_CACHE_PATH = os.path.join("cache", "llm_responses.sqlite")
+# Entries older than this are treated as missing; colour variants and re-crawls reuse images for months
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50000
+
+
+def image_identity(image_path: str) -> str:
+    """
+    What identifies an image for caching: the URL itself for remote images, the
+    SHA-256 of the bytes for local files (so a re-downloaded copy still hits).
+    """
+    if image_path.startswith("http://") or image_path.startswith("https://"):
+        return image_path
+    return "sha256:" + hashlib.sha256(Path(image_path).read_bytes()).hexdigest()
+
+
+def response_cache_key(image_paths: Iterable[str], model: str, instructions: str, temperature: float) -> str:
+    """
+    SHA-256 over everything that decides the model's answer: the sorted image
+    identities (so the same set in another order hits), the model, the
+    instruction text and the temperature. Changing the prompt changes the key.
+    """
+    payload = {
+        "images": sorted(image_identity(path) for path in image_paths),
+        "model": model,
+        "instructions": instructions,
+        "temperature": temperature,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent cache of parsed LLM responses keyed by response_cache_key.
+
+    Entries expire `ttl_seconds` after they were stored, and once more than
+    `max_entries` are kept the least recently used ones are evicted. Hits and
+    misses are counted for the life of the object (see stats()). Backends
+    implement _load, _store and _clear.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # Lookups come from several threads at once (asyncio.to_thread, job threads)
+        self._counter_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        value = self._load(key)
+        with self._counter_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict):
+        self._store(key, value)
+
+    def clear(self):
+        self._clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+        }
+
+    def close(self):
+        pass
+
+    def _load(self, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def _store(self, key: str, value: Dict):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+
+class SqliteResponseCache(ResponseCache):
+    """
+    ResponseCache in a local SQLite file. Each entry records when it was stored
+    (for the TTL) and last read (for LRU eviction). The connection is shared by
+    the threads that run jobs, behind a lock.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used);
+        """)
+
+    def _load(self, key: str) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds is not None and row[1] < now - self.ttl_seconds:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def _store(self, key: str, value: Dict):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            if self.ttl_seconds is not None:
+                self._db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            if self.max_entries is not None:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+
+    def _clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        self._db.close()
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    ResponseCache in Redis, shared by every worker using the same server. The
+    TTL is the key's own expiry; a sorted set of last-use times drives LRU
+    eviction past `max_entries`.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "llm_cache:", **kwargs):
+        super().__init__(**kwargs)
+        if redis is None:
+            raise ImportError("The Redis response cache needs the redis package: pip install redis")
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._lru_key = prefix + "lru"
+
+    def _load(self, key: str) -> Optional[Dict]:
+        value = self._redis.get(self.prefix + key)
+        if value is None:
+            self._redis.zrem(self._lru_key, key)
+            return None
+        self._redis.zadd(self._lru_key, {key: time.time()})
+        return json.loads(value)
+
+    def _store(self, key: str, value: Dict):
+        ttl = int(self.ttl_seconds) if self.ttl_seconds is not None else None
+        pipe = self._redis.pipeline()
+        pipe.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=ttl)
+        pipe.zadd(self._lru_key, {key: time.time()})
+        pipe.execute()
+        if self.max_entries is not None:
+            # Oldest first; everything before the newest max_entries goes
+            evicted = self._redis.zrange(self._lru_key, 0, -self.max_entries - 1)
+            if evicted:
+                pipe = self._redis.pipeline()
+                pipe.delete(*(self.prefix + old for old in evicted))
+                pipe.zrem(self._lru_key, *evicted)
+                pipe.execute()
+
+    def _clear(self):
+        keys = self._redis.zrange(self._lru_key, 0, -1)
+        if keys:
+            self._redis.delete(*(self.prefix + key for key in keys))
+        self._redis.delete(self._lru_key)
+
+    def close(self):
+        self._redis.close()
+
+
+_shared_cache: Optional[ResponseCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    The process-wide response cache chosen by the LLM_CACHE environment variable:
+    unset means the SQLite file cache/llm_responses.sqlite, a path another SQLite
+    file, a redis:// URL the Redis backend, and "off" no caching (None).
+    LLM_CACHE_TTL (seconds) and LLM_CACHE_MAX_ENTRIES tune eviction.
+    """
+    global _shared_cache
+    setting = os.getenv(CACHE_ENV) or DEFAULT_CACHE_PATH
+    if setting.lower() == "off":
+        return None
+    # The first lookups of a batch arrive from several threads at once
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            options = {
+                "ttl_seconds": float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS)),
+                "max_entries": int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            }
+            if setting.startswith(("redis://", "rediss://", "unix://")):
+                _shared_cache = RedisResponseCache(setting, **options)
+            else:
+                _shared_cache = SqliteResponseCache(setting, **options)
+    return _shared_cache
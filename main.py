@@ -3,10 +3,9 @@ import json
 import os
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Optional
 from pathlib import Path
 
-import pandas as pd
 import redis
 from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
 from fastapi.responses import JSONResponse, FileResponse
@@ -20,8 +19,11 @@ ngrok.set_auth_token("2xzc5Cq4UND7P5xOGoBgSMlxsVu_4ADaFx9BEhUyBz4V2SkH9")
 
 
 # Import your existing modules
-from image_details_extractor import generate_product_description
+from image_details_extractor import close_async_client, describe_products
+from llm_cache import get_response_cache
 from tagline_generator import generate_luxury_tagline_from_json
+from jsonl_io import JsonlWriter, count_jsonl, iter_jsonl, iter_products, write_json_array
+from product_export import export_products
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -33,6 +35,9 @@ app = FastAPI(
 # Redis connection
 redis_client = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
 
+# Image analyses in flight at once per job
+DESCRIBE_CONCURRENCY = 8
+
 # Request models
 class ProcessRequest(BaseModel):
     file_path: str
@@ -55,62 +60,6 @@ def generate_job_id() -> str:
     unique_id = str(uuid.uuid4())[:8]
     return f"job_{timestamp}_{unique_id}"
 
-def save_to_excel(results: List[Dict], output_file: str):
-    """
-    Saves the scraped data to an Excel file, flattening nested structures
-    and storing all individual reviews in one column (one row per product).
-    """
-    excel_data = []
-    for result in results:
-        # Base fields for this product
-        row = {
-            "URL": result.get("url", ""),
-            # "Editor's Notes": result.get("Editor's Notes", ""),
-            "Images": ", ".join(result.get("Images", [])),
-            "Overall Rating": result.get("Reviews", {}).get("overall_rating", ""),
-            "Number of Reviews": result.get("Reviews", {}).get("number_of_reviews", ""),
-            # Newly added fields
-            "Product Description": result.get("Product Description", ""),
-            "Luxury Tagline": result.get("Luxury Tagline", "")
-        }
-
-        # Add other product-specific keys
-        for key, value in result.items():
-            if key not in ["url", "Editor's Notes", "Images", "Reviews", "Product Description", "Luxury Tagline"]:
-                if isinstance(value, list):
-                    row[key] = ", ".join(value)
-                elif isinstance(value, dict):
-                    continue
-                else:
-                    row[key] = value
-
-        # Aggregate all individual reviews into one string
-        individual_reviews = result.get("Reviews", {}).get("individual_reviews", [])
-        review_strings = []
-        for review in individual_reviews:
-            reviewer = review.get("reviewer", "")
-            date = review.get("date", "")
-            rating = review.get("rating", "")
-            title = review.get("title", "")
-            description = review.get("description", "")
-            recommend = review.get("recommend", "")
-            thumbs_up = review.get("thumbs_up", 0)
-            thumbs_down = review.get("thumbs_down", 0)
-
-            single_review = (
-                f"{reviewer} ({date}) rated {rating}:\n"
-                f"Title: {title}\n"
-                f"Description: {description}\n"
-                f"Recommend: {recommend}, Thumbs Up: {thumbs_up}, Thumbs Down: {thumbs_down}"
-            )
-            review_strings.append(single_review)
-
-        row["All Reviews"] = "\n\n".join(review_strings)
-        excel_data.append(row)
-
-    df = pd.DataFrame(excel_data)
-    df.to_excel(output_file, index=False)
-
 async def process_products_job(job_id: str, input_json_path: str):
     """Background job to process products"""
     try:
@@ -119,7 +68,9 @@ async def process_products_job(job_id: str, input_json_path: str):
         output_dir.mkdir(exist_ok=True)
         
         output_json_path = output_dir / f"{job_id}_processed.json"
+        output_jsonl_path = output_dir / f"{job_id}_processed.jsonl"
         output_excel_path = output_dir / f"{job_id}_processed.xlsx"
+        output_csv_path = output_dir / f"{job_id}_processed.csv"
         # Update job status to processing
         job_data = {
             "job_id": job_id,
@@ -132,50 +83,53 @@ async def process_products_job(job_id: str, input_json_path: str):
         # Load JSON file
         if not os.path.exists(input_json_path):
             raise FileNotFoundError(f"Input file not found: {input_json_path}")
-            
-        with open(input_json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
 
-        total_items = len(data)
+        # .jsonl input is read one product at a time; a JSON array has to be loaded whole
+        if input_json_path.endswith(".jsonl"):
+            total_items = count_jsonl(input_json_path)
+            data = iter_products(input_json_path)
+        else:
+            data = list(iter_products(input_json_path))
+            total_items = len(data)
         redis_client.hset(f"job:{job_id}", "total_items", total_items)
 
-        # Process each product
-        for i, item in enumerate(data):
-            current_url = item.get('url', f'Item {i+1}')
-            
-            # Update progress
-            redis_client.hset(f"job:{job_id}", mapping={
-                "progress": i,
-                "current_item": current_url
-            })
+        # Process each product, streaming it to the JSON Lines output as soon as it is done.
+        # Image analyses for the next products run concurrently while earlier ones finish.
+        with JsonlWriter(str(output_jsonl_path)) as writer:
+            async for item, product_description in describe_products(data, concurrency=DESCRIBE_CONCURRENCY):
+                current_url = item.get('url', f'Item {writer.count + 1}')
+
+                # Update progress
+                redis_client.hset(f"job:{job_id}", mapping={
+                    "progress": writer.count,
+                    "current_item": current_url
+                })
+
+                print(f"Processing: {current_url}")
 
-            print(f"Processing: {current_url}")
-            images = item.get("Images", [])
-            
-            # Generate product description from images
-            if images:
-                product_description = generate_product_description(images)
-            else:
-                product_description = {}
-
-            # Generate luxury tagline
-            luxury_tagline = generate_luxury_tagline_from_json(product_description, item)
-            item["Product Description"] = product_description
-            item["Luxury Tagline"] = luxury_tagline
-            
-            print(f"Completed: {current_url}")
+                # Generate luxury tagline (a blocking API call, kept off the event loop)
+                luxury_tagline = await asyncio.to_thread(generate_luxury_tagline_from_json, product_description, item)
+                item["Product Description"] = product_description
+                item["Luxury Tagline"] = luxury_tagline
+
+                writer.write(item)
+                print(f"Completed: {current_url}")
 
         # Create output directories if they don't exist
         output_dir.mkdir(exist_ok=True)
 
-        # Save updated JSON
-        with open(output_json_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        # Save updated JSON, streamed back from the JSON Lines output
+        write_json_array(iter_jsonl(str(output_jsonl_path)), str(output_json_path))
 
-        # Save to Excel
-        save_to_excel(data, str(output_excel_path))
+        # Save to Excel and CSV from a single flattening pass
+        # Editor's Notes stay out of the processed exports, as they always have
+        export_products(
+            iter_jsonl(str(output_jsonl_path)), [str(output_excel_path), str(output_csv_path)],
+            exclude=["Editor's Notes"],
+        )
 
         # Update job status to completed
+        response_cache = get_response_cache()
         redis_client.hset(f"job:{job_id}", mapping={
             "status": "completed",
             "completed_at": datetime.now().isoformat(),
@@ -183,8 +137,12 @@ async def process_products_job(job_id: str, input_json_path: str):
             "current_item": "All items completed",
             "result": json.dumps({
                 "output_json_path": str(output_json_path),
+                "output_jsonl_path": str(output_jsonl_path),
                 "output_excel_path": str(output_excel_path), 
-                "total_processed": total_items
+                "output_csv_path": str(output_csv_path),
+                "total_processed": total_items,
+                # Process-wide image-analysis cache counters (see llm_cache)
+                "llm_cache": response_cache.stats() if response_cache else None
             })
         })
 
@@ -196,6 +154,8 @@ async def process_products_job(job_id: str, input_json_path: str):
             "error": str(e)
         })
         print(f"Job {job_id} failed: {str(e)}")
+    finally:
+        await close_async_client()
 
 def worker():
     """Background worker to process jobs from Redis queue"""
@@ -291,7 +251,7 @@ async def delete_job(job_id: str):
 
 @app.get("/download/{job_id}/{file_type}")
 async def download_result(job_id: str, file_type: str):
-    """Download the result files (json/excel)"""
+    """Download the result files (json/jsonl/excel/csv)"""
     try:
         job_data = redis_client.hgetall(f"job:{job_id}")
         if not job_data:
@@ -304,10 +264,14 @@ async def download_result(job_id: str, file_type: str):
         
         if file_type == "json":
             file_path = result.get("output_json_path")
+        elif file_type == "jsonl":
+            file_path = result.get("output_jsonl_path")
         elif file_type == "excel":
             file_path = result.get("output_excel_path")
+        elif file_type == "csv":
+            file_path = result.get("output_csv_path")
         else:
-            raise HTTPException(status_code=400, detail="Invalid file type. Use 'json' or 'excel'")
+            raise HTTPException(status_code=400, detail="Invalid file type. Use 'json', 'jsonl', 'excel' or 'csv'")
         
         if not file_path or not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="File not found")
@@ -324,10 +288,10 @@ async def download_result(job_id: str, file_type: str):
 
 @app.post("/upload-and-process")
 async def upload_and_process(file: UploadFile = File(...)):
-    """Upload a JSON file and immediately start processing"""
+    """Upload a JSON or JSON Lines file and immediately start processing"""
     try:
-        if not file.filename.endswith('.json'):
-            raise HTTPException(status_code=400, detail="Only JSON files are allowed")
+        if not file.filename.endswith(('.json', '.jsonl')):
+            raise HTTPException(status_code=400, detail="Only JSON or JSONL files are allowed")
         
         # Create uploads directory
         upload_dir = Path("api_uploads")
@@ -338,14 +302,20 @@ async def upload_and_process(file: UploadFile = File(...)):
         filename = f"{timestamp}_{file.filename}"
         file_path = upload_dir / filename
         
+        # Copied in 1 MB chunks, so a large upload is never held in memory
         with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+            while chunk := await file.read(1024 ** 2):
+                buffer.write(chunk)
         
-        # Validate JSON format
+        # Validate JSON format (line by line for JSONL, which is never loaded whole)
         try:
             with open(file_path, "r", encoding="utf-8") as f:
-                json.load(f)
+                if file.filename.endswith('.jsonl'):
+                    for line in f:
+                        if line.strip():
+                            json.loads(line)
+                else:
+                    json.load(f)
         except json.JSONDecodeError:
             raise HTTPException(status_code=400, detail="Invalid JSON format")
         
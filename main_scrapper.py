@@ -1,199 +1,562 @@
 import asyncio
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
-import json
-import pandas as pd
-from typing import List, Dict
-import uuid
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Iterable, List, Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
 import os
-from link_grabber import scrape_product_links
+from link_discovery import discover_product_links
+from sitemap_discovery import SitemapDiscovery
+from browser_pool import BrowserPool
+from page_readiness import ReadinessStrategy
+from product_parser import extract_product_details
+from parse_pipeline import ParsePipeline
+from crawl_checkpoint import CrawlCheckpoint
+from crawl_frontier import CrawlFrontier
+from jsonl_io import JsonlWriter, write_json_array
+from product_export import export_products
+from html_archive import get_archive
+from fingerprint_store import FingerprintStore, content_hash
+from http_fetcher import HttpFetcher, extract_from_html, missing_fields, summarize_fetch_paths, try_http_extraction
+from review_harvester import PageFetcher, ReviewHarvester
+from failure_policy import FailurePolicy, MissingSelectorsError
+from rate_limiter import get_rate_limiter, paced_goto
+
+# Shared by every scrape that doesn't pass its own strategy, so a run's timings end up in one place
+default_readiness = ReadinessStrategy()
+
+# A stored product older than this is always re-extracted, whatever the change check says
+DEFAULT_MAX_AGE = timedelta(days=7)
+
+async def save_snapshot(url: str, content: str, output_dir: str) -> str:
+    """
+    Stores the page's HTML in the compressed, content-addressed archive under output_dir
+    (see html_archive) without blocking the event loop, and returns the snapshot path.
+    """
+    return await get_archive(output_dir).save_async(url, content)
 
-async def scrape_and_extract_details(url: str, output_dir: str) -> Dict:
+async def fetch_product_page(url: str, output_dir: str, pool: BrowserPool, readiness: ReadinessStrategy) -> str:
     """
-    Launches a headless browser, navigates to the given URL, waits for 5 seconds,
-    saves the HTML content to a file, and extracts product details, images, and reviews using BeautifulSoup.
+    Takes a page from the browser pool, navigates to the given URL, waits until the selectors
+    the extractor needs are present (see page_readiness), archives the HTML content
+    and returns it. Navigation is paced by the host's adaptive rate limit (see rate_limiter).
+    Raises ThrottledError on a 429/5xx and MissingSelectorsError when none of the required
+    selectors appeared.
     """
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=False)
-            page = await browser.new_page()
-            await page.goto(url)
+    async with pool.page() as page:
+        await paced_goto(page, url)
 
-            # Wait for the page to fully load
-            await asyncio.sleep(9)
+        # Wait for the product title, details, images and reviews to render
+        record = await readiness.wait(page, url)
+        required = [s.name for s in readiness.selectors if s.required]
+        if required and set(required) <= set(record["missing"]):
+            raise MissingSelectorsError(url, record["missing"])
 
-            # Get the HTML content
-            content = await page.content()
+        # Get the HTML content
+        content = await page.content()
 
-            # Generate unique filename for HTML
-            html_filename = f"scraped_page_{uuid.uuid4().hex}.html"
-            html_filepath = os.path.join(output_dir, html_filename)
-            
-            # Ensure output directory exists
-            os.makedirs(output_dir, exist_ok=True)
+    await save_snapshot(url, content, output_dir)
+    return content
 
-            # Save to file
-            with open(html_filepath, "w", encoding="utf-8") as f:
-                f.write(content)
+async def scrape_via_http(url: str, output_dir: str, http_fetcher: HttpFetcher) -> Optional[Dict]:
+    """
+    Browserless fast path: returns the product tagged with fetch_path "http" when plain HTTP
+    yields every required field (see http_fetcher), otherwise None.
+    """
+    product, content = await try_http_extraction(http_fetcher, url)
+    if product is None:
+        return None
+    await save_snapshot(url, content, output_dir)
+    product["fetch_path"] = "http"
+    return product
+
+async def scrape_and_extract_details(
+    url: str,
+    output_dir: str,
+    pool: Optional[BrowserPool] = None,
+    readiness: Optional[ReadinessStrategy] = None,
+    http_fetcher: Optional[HttpFetcher] = None,
+    failure_policy: Optional[FailurePolicy] = None,
+) -> Dict:
+    """
+    Tries the browserless fast path first when an http_fetcher is given. Otherwise, or when
+    required fields are missing, fetches the product page with fetch_product_page (launching
+    a one-off browser when no pool is given) and extracts product details, images, and
+    reviews with product_parser.extract_product_details.
+    The result's "fetch_path" is "http" or "browser".
+    With a failure_policy, failed attempts are retried with backoff and a URL that never
+    succeeds is dead-lettered (see failure_policy); either way a failure returns {}.
+    """
+    readiness = readiness or default_readiness
+    if pool is None:
+        async with BrowserPool(size=1) as own_pool:
+            return await scrape_and_extract_details(url, output_dir, own_pool, readiness, http_fetcher, failure_policy)
 
-            # Parse with BeautifulSoup
-            soup = BeautifulSoup(content, "html.parser")
+    if failure_policy is not None:
+        return await failure_policy.run(url, lambda: _scrape_once(url, output_dir, pool, readiness, http_fetcher))
+    try:
+        return await _scrape_once(url, output_dir, pool, readiness, http_fetcher)
+    except Exception as e:
+        print(f"Error Processing {url}: ",e)
+        return {}
 
-            await browser.close()
+async def _scrape_once(
+    url: str,
+    output_dir: str,
+    pool: BrowserPool,
+    readiness: ReadinessStrategy,
+    http_fetcher: Optional[HttpFetcher],
+) -> Dict:
+    """One attempt at a product; raises on failure."""
+    if http_fetcher is not None:
+        product = await scrape_via_http(url, output_dir, http_fetcher)
+        if product:
+            return product
+
+    content = await fetch_product_page(url, output_dir, pool, readiness)
+    product = extract_product_details(content, url)
+    product["fetch_path"] = "browser"
+    return product
+    
+async def iter_scrape_results(
+    urls: List[str],
+    output_dir: str,
+    pool: BrowserPool,
+    concurrency: int = 4,
+    per_host_limit: Optional[int] = None,
+    readiness: Optional[ReadinessStrategy] = None,
+    parse_pipeline: Optional[ParsePipeline] = None,
+    http_fetcher: Optional[HttpFetcher] = None,
+    failure_policy: Optional[FailurePolicy] = None,
+) -> AsyncIterator[Tuple[int, str, Dict]]:
+    """
+    Scrapes URLs concurrently and yields (input_index, url, result) as each one finishes.
+    At most `concurrency` pages are in flight overall and at most `per_host_limit`
+    per host (defaults to the global cap).
+    With a parse_pipeline, pages are only fetched here and parsed on its process pool,
+    so a fetch slot is freed as soon as the HTML is queued.
+    With an http_fetcher, each URL tries the browserless fast path first.
+    Failed attempts are retried per the failure_policy (a default FailurePolicy when none
+    is given); its backoff and open circuit breakers wait outside the concurrency slots.
+    """
+    readiness = readiness or default_readiness
+    failure_policy = failure_policy or FailurePolicy()
+    global_limit = asyncio.Semaphore(concurrency)
+    host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    async def attempt(url: str) -> Dict:
+        host = urlparse(url).netloc
+        host_limit = host_limits.setdefault(host, asyncio.Semaphore(per_host_limit or concurrency))
+        # Take the host slot first so a blocked host never holds a global slot
+        async with host_limit:
+            async with global_limit:
+                print(f"Scraping {url}...")
+                if parse_pipeline is None:
+                    return await _scrape_once(url, output_dir, pool, readiness, http_fetcher)
+                if http_fetcher is not None:
+                    product = await scrape_via_http(url, output_dir, http_fetcher)
+                    if product:
+                        return product
+                fetch_start = time.perf_counter()
+                content = await fetch_product_page(url, output_dir, pool, readiness)
+                parse_pipeline.fetch_stats.record(fetch_start, time.perf_counter())
+                # Waits here while the parse queue is full; the parse future is handed out
+                # of the retry loop so parsing never holds a fetch slot
+                return {"parsed": await parse_pipeline.submit(url, content)}
+
+    async def scrape_one(index: int, url: str) -> Tuple[int, str, Dict]:
+        product = await failure_policy.run(url, lambda: attempt(url))
+        if "parsed" in product:
+            product = await product["parsed"]
+            if product:
+                product["fetch_path"] = "browser"
+        return index, url, product
+
+    tasks = [asyncio.create_task(scrape_one(index, url)) for index, url in enumerate(urls)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+class ScrapeOptions(NamedTuple):
+    """The scrape_multiple_urls settings passed down to the stages that run a scrape."""
+    concurrency: int
+    per_host_limit: Optional[int]
+    ordered: bool
+    readiness: Optional[ReadinessStrategy]
+    failure_policy: FailurePolicy
+    parse_workers: int
+    http_fast_path: bool
+
+async def scrape_multiple_urls(
+    urls: List[str],
+    output_dir: str,
+    pool: Optional[BrowserPool] = None,
+    concurrency: int = 1,
+    per_host_limit: Optional[int] = None,
+    ordered: bool = True,
+    readiness: Optional[ReadinessStrategy] = None,
+    parse_workers: int = 0,
+    http_fast_path: bool = False,
+    checkpoint_path: Optional[str] = None,
+    jsonl_output: Optional[str] = None,
+    collect: bool = True,
+    failure_policy: Optional[FailurePolicy] = None,
+) -> List[Dict]:
+    """
+    Scrapes multiple URLs from one shared browser pool (started for the run if none is
+    given), `concurrency` at a time, and returns the extracted product details, in input
+    order when `ordered`. Optional stages: `parse_workers` (see parse_pipeline),
+    `http_fast_path` (see http_fetcher), `checkpoint_path` (see crawl_checkpoint) and
+    `jsonl_output` (see jsonl_io); `collect=False` returns an empty list instead of
+    keeping results in memory. Failures are handled by `failure_policy`.
+    """
+    failure_policy = failure_policy or FailurePolicy()
+    options = ScrapeOptions(
+        concurrency=concurrency,
+        per_host_limit=per_host_limit,
+        ordered=ordered,
+        readiness=readiness,
+        failure_policy=failure_policy,
+        parse_workers=parse_workers,
+        http_fast_path=http_fast_path,
+    )
 
-            details_container = soup.find('div', id='description2')
-            product_details = {"url": url}
+    try:
+        if jsonl_output is None:
+            return await _scrape_checkpointed(urls, output_dir, pool, options, checkpoint_path, None, collect)
 
-            product_name_tag = soup.find('h3', {'data-qa': 'pdp_txt_pdt_title'})
-            if product_name_tag:
-                product_details['product_name'] = product_name_tag.get_text(strip=True)
-            else:
-                product_details['product_name'] = None  # or use "N/A"
+        with JsonlWriter(jsonl_output) as writer:
+            return await _scrape_checkpointed(
+                urls, output_dir, pool, options, checkpoint_path, lambda url, result: writer.write(result), collect
+            )
+    finally:
+        print(f"Failures: {failure_policy.summary()}")
+        print(f"Rate limits: {get_rate_limiter().metrics()}")
+
+async def _scrape_checkpointed(
+    urls: List[str],
+    output_dir: str,
+    pool: Optional[BrowserPool],
+    options: ScrapeOptions,
+    checkpoint_path: Optional[str],
+    on_result: Optional[Callable[[str, Dict], None]],
+    collect: bool,
+) -> List[Dict]:
+    if checkpoint_path is None:
+        return await _scrape_all(urls, output_dir, pool, options, on_result=on_result, collect=collect)
+
+    with CrawlCheckpoint(checkpoint_path) as checkpoint:
+        pending = checkpoint.pending(urls)
+        print(f"Checkpoint {checkpoint_path}: {len(urls) - len(pending)} of {len(urls)} URLs already done")
+        if on_result is not None:
+            # Products finished in earlier runs are streamed first
+            for url in urls:
+                if checkpoint.is_done(url):
+                    on_result(url, checkpoint.completed[url])
+
+        def record(url: str, result: Dict):
+            checkpoint.record(url, result)
+            if on_result is not None:
+                on_result(url, result)
+
+        if pending:
+            await _scrape_all(pending, output_dir, pool, options, on_result=record, collect=False)
+        return checkpoint.results_for(urls) if collect else []
+
+async def _scrape_all(
+    urls: List[str],
+    output_dir: str,
+    pool: Optional[BrowserPool],
+    options: ScrapeOptions,
+    on_result: Optional[Callable[[str, Dict], None]] = None,
+    collect: bool = True,
+) -> List[Dict]:
+    """Starts whatever shared services the options ask for and collects the scraped results."""
+    if pool is None:
+        contexts = max(1, -(-options.concurrency // 4))
+        async with BrowserPool(contexts_per_browser=contexts, max_pages_per_context=4) as own_pool:
+            return await _scrape_all(urls, output_dir, own_pool, options, on_result, collect)
+
+    if options.http_fast_path:
+        fetch_paths: List[Dict] = []
+
+        def track(url: str, result: Dict):
+            fetch_paths.append({"fetch_path": result.get("fetch_path")})
+            if on_result is not None:
+                on_result(url, result)
+
+        async with HttpFetcher(max_connections=max(10, options.concurrency * 2)) as http_fetcher:
+            results = await _scrape_with_pipeline(urls, output_dir, pool, options, http_fetcher, track, collect)
+        print(f"Fetch paths: {summarize_fetch_paths(fetch_paths)}")
+        return results
+
+    return await _scrape_with_pipeline(urls, output_dir, pool, options, None, on_result, collect)
+
+async def _scrape_with_pipeline(
+    urls: List[str],
+    output_dir: str,
+    pool: BrowserPool,
+    options: ScrapeOptions,
+    http_fetcher: Optional[HttpFetcher],
+    on_result: Optional[Callable[[str, Dict], None]],
+    collect: bool,
+) -> List[Dict]:
+    def scrape(parse_pipeline: Optional[ParsePipeline]) -> AsyncIterator[Tuple[int, str, Dict]]:
+        return iter_scrape_results(
+            urls, output_dir, pool,
+            concurrency=options.concurrency,
+            per_host_limit=options.per_host_limit,
+            readiness=options.readiness,
+            parse_pipeline=parse_pipeline,
+            http_fetcher=http_fetcher,
+            failure_policy=options.failure_policy,
+        )
+
+    if options.parse_workers > 0:
+        async with ParsePipeline(workers=options.parse_workers) as parse_pipeline:
+            results = await _collect_results(scrape(parse_pipeline), options.ordered, on_result, collect)
+        print(f"Pipeline throughput: {parse_pipeline.summary()}")
+        return results
+
+    return await _collect_results(scrape(None), options.ordered, on_result, collect)
+
+async def _collect_results(
+    scraped: AsyncIterator[Tuple[int, str, Dict]],
+    ordered: bool,
+    on_result: Optional[Callable[[str, Dict], None]] = None,
+    collect: bool = True,
+) -> List[Dict]:
+    finished: List[Tuple[int, Dict]] = []
+    async for index, url, result in scraped:
+        # Only add to results if not an empty dict
+        if result:
+            if collect:
+                finished.append((index, result))
+            if on_result is not None:
+                on_result(url, result)
+        else:
+            print(f"Skipped {url} because scrape returned empty result.")
 
-            # Extract product price
-            price_tag = soup.find('span', {'data-qa': 'cm_txt_pdt_price'})
-            if price_tag:
-                product_details['price'] = price_tag.get_text(strip=True)
-            else:
-                product_details['price'] = None  # or use "N/A"
-
-            if not details_container:
-                print(f"Product details section not found for {url}")
-                return product_details
-
-            # Extract detail sections (e.g., Size, Materials)
-            for section in details_container.find_all('div', class_='product-props__details'):
-                header_tag = section.find('h2')
-                if not header_tag:
-                    continue
-                header = header_tag.get_text(strip=True)
-                items = [li.get_text(strip=True) for li in section.find_all('li')]
-                product_details[header] = items
-
-            # Extract Editor's Notes
-            editor_section = details_container.find_next_sibling('div', class_='css-xc41pm')
-            if editor_section:
-                notes_div = editor_section.find('div', class_='css-1r44snt')
-                if notes_div:
-                    notes = notes_div.get_text(strip=True)
-                    product_details["Editor's Notes"] = notes
-
-            # Extract image URLs from splide container
-            splide_container = soup.find('div', class_='css-8h57m5')
-            if splide_container:
-                img_tags = splide_container.find_all('img', class_='chakra-image css-boil6')
-                image_urls = list(set(img.get('src') for img in img_tags if img.get('src')))
-                product_details["Images"] = image_urls
-            else:
-                print(f"Splide image container not found for {url}")
-                product_details["Images"] = []
+    if ordered:
+        finished.sort(key=lambda item: item[0])
+    return [result for _, result in finished]
 
-            # Extract overall reviews
-            overall_reviews_div = soup.find('div', class_='css-1vjihxg')
-            if overall_reviews_div:
-                rating_div = overall_reviews_div.find('div', class_='css-vnjdh5')
-                overall_rating = rating_div.get_text(strip=True).split()[0] if rating_div else None
+async def harvest_reviews(
+    products: List[Dict],
+    fetch_page: PageFetcher,
+    concurrency: int = 4,
+    stored_by_url: Optional[Dict[str, List[Dict]]] = None,
+) -> Dict:
+    """
+    Replaces each product's first-page reviews with every review the site has (see
+    review_harvester), fetching at most `concurrency` review pages at a time across all
+    products. With stored_by_url (URL -> reviews from an earlier crawl), each product only
+    pages back to its newest stored review. Returns the harvester's counters.
+    """
+    harvester = ReviewHarvester(fetch_page, concurrency=concurrency)
+    stored_by_url = stored_by_url or {}
+
+    async def harvest(product: Dict):
+        if not product.get("Reviews"):
+            return
+        try:
+            product["Reviews"] = await harvester.harvest(
+                product["url"], product["Reviews"], stored_by_url.get(product["url"])
+            )
+        except Exception as e:
+            print(f"Review harvest failed for {product['url']}: {e}")
 
-                reviews_count_div = overall_reviews_div.find('div', class_='css-1tx6eu7')
-                number_of_reviews = reviews_count_div.get_text(strip=True).split()[0] if reviews_count_div else None
-            else:
-                overall_rating = None
-                number_of_reviews = None
-
-            # Extract individual reviews
-            review_items = soup.find_all('div', class_='review-list-item css-cxd8co')
-            individual_reviews = []
-
-            for review_item in review_items:
-                # Extract reviewer's name and date
-                user_info_div = review_item.find('div', class_='review-list-item-user-info css-aqx73m')
-                if user_info_div:
-                    user_info_text = user_info_div.get_text(strip=True)
-                    try:
-                        name, date = user_info_text.split(', ', 1)
-                    except ValueError:
-                        name = user_info_text
-                        date = None
-                else:
-                    name = None
-                    date = None
-
-                # Extract rating from stars
-                stars_div = review_item.find('div', class_='chakra-stack css-16yi24e')
-                if stars_div:
-                    full_stars = stars_div.find_all('svg', {'data-qa': 'cm_icon_pt_rs_filled'})
-                    half_stars = stars_div.find_all('svg', {'data-qa': 'cm_icon_pt_rs_half'})
-                    rating = len(full_stars) + 0.5 * len(half_stars)
-                else:
-                    rating = None
-
-                # Extract review title
-                title_h5 = review_item.find('h5', class_='review-response-details-title css-1hbkifp')
-                title = title_h5.get_text(strip=True) if title_h5 else None
-
-                # Extract review description
-                desc_div = review_item.find('div', class_='review-response-details-description show-less css-1a6nsdk')
-                description = desc_div.get_text(strip=True) if desc_div else None
-
-                # Extract recommendation
-                recommend_div = review_item.find('div', class_='css-1ptaiic')
-                if recommend_div:
-                    recommend_text = recommend_div.get_text(strip=True)
-                    try:
-                        recommend = recommend_text.split(': ')[1]
-                    except IndexError:
-                        recommend = None
-                else:
-                    recommend = None
-
-                # Extract helpfulness counts
-                thumbs_up_span = review_item.find('span', {'data-qa': 'rnr_txt_likerevcount'})
-                thumbs_up = int(thumbs_up_span.get_text(strip=True)) if thumbs_up_span else 0
-
-                thumbs_down_span = review_item.find('span', {'data-qa': 'rnr_txt_dislikerevcount'})
-                thumbs_down = int(thumbs_down_span.get_text(strip=True)) if thumbs_down_span else 0
-
-                # Compile individual review
-                review = {
-                    "reviewer": name,
-                    "date": date,
-                    "rating": rating,
-                    "title": title,
-                    "description": description,
-                    "recommend": recommend,
-                    "thumbs_up": thumbs_up,
-                    "thumbs_down": thumbs_down
-                }
-                individual_reviews.append(review)
-
-            # Add reviews to product details
-            product_details["Reviews"] = {
-                "overall_rating": overall_rating,
-                "number_of_reviews": number_of_reviews,
-                "individual_reviews": individual_reviews
-            }
-
-            return product_details
+    await asyncio.gather(*(harvest(product) for product in products))
+    print(f"Review harvest: {harvester.stats}")
+    return harvester.stats
+
+async def detect_change(
+    url: str, store: FingerprintStore, http_fetcher: HttpFetcher, max_age: Optional[timedelta] = DEFAULT_MAX_AGE
+) -> Tuple[str, Dict]:
+    """
+    Cheap change check for one URL with a conditional GET. Returns (status, validators), where status is
+    "new" (never crawled), "not_modified" (304), "unchanged" (same fields over plain HTTP) or "changed".
+    Pages whose plain HTTP extraction lacks any required field (client-rendered pages) get no http_hash
+    and always count as changed, as does a product last crawled more than `max_age` ago.
+    """
+    entry = store.get(url)
+    stale = (
+        entry is not None and max_age is not None
+        and (not entry.get("last_crawled") or datetime.fromisoformat(entry["last_crawled"]) < datetime.now() - max_age)
+    )
+    try:
+        response = await http_fetcher.get(url, headers={} if stale else store.conditional_headers(url))
     except Exception as e:
-        print(f"Error Processing {url}: ",e)
-        return {}
-    
-async def scrape_multiple_urls(urls: List[str], output_dir: str) -> List[Dict]:
+        print(f"Change check failed for {url}: {e}")
+        return ("new" if entry is None else "changed"), {}
+
+    if response.status_code == 304 and entry is not None and not stale:
+        return "not_modified", {}
+
+    http_hash = None
+    if response.status_code == 200:
+        product = await asyncio.to_thread(extract_from_html, response.text, url)
+        # A hash of an incomplete extraction would match forever on a page that renders client-side
+        if not missing_fields(product, url):
+            http_hash = content_hash(product)
+    validators = {
+        "etag": response.headers.get("etag"),
+        "last_modified": response.headers.get("last-modified"),
+        "content_length": len(response.content),
+        "http_hash": http_hash,
+    }
+    if entry is None:
+        return "new", validators
+    if not stale and http_hash and http_hash == entry.get("http_hash"):
+        return "unchanged", validators
+    return "changed", validators
+
+async def incremental_scrape(
+    urls: List[str],
+    output_dir: str,
+    fingerprint_path: str,
+    pool: Optional[BrowserPool] = None,
+    check_concurrency: int = 10,
+    review_fetcher: Optional[PageFetcher] = None,
+    max_age: Optional[timedelta] = DEFAULT_MAX_AGE,
+    **scrape_options,
+) -> List[Dict]:
     """
-    Scrapes multiple URLs and returns a list of extracted product details.
-    If scrape_and_extract_details returns an empty dict ({}), that result is skipped.
+    Scheduled re-crawl that only fully re-extracts new or changed products.
+
+    Every URL first gets a cheap change check (see detect_change) against the fingerprint
+    store at fingerprint_path; products last extracted more than `max_age` ago always count as
+    changed. Unchanged products are returned from the store; the rest go
+    through scrape_multiple_urls with scrape_options, and the store is updated with their
+    new fingerprints. With a review_fetcher, re-scraped products also get their newer reviews
+    harvested back to the newest review already in the store (see harvest_reviews).
+    Prints a summary of hits, misses and response bytes avoided by 304s.
     """
+    store = FingerprintStore(fingerprint_path)
+    summary = {"hits": 0, "misses": 0, "new": 0, "changed": 0, "not_modified": 0, "bytes_avoided": 0}
+    check_limit = asyncio.Semaphore(check_concurrency)
+
+    async with HttpFetcher(max_connections=check_concurrency) as http_fetcher:
+        async def check(url: str) -> Tuple[str, str, Dict]:
+            async with check_limit:
+                return (url, *await detect_change(url, store, http_fetcher, max_age))
+
+        checks = await asyncio.gather(*(check(url) for url in urls))
+
+    to_scrape: List[str] = []
+    validators_by_url: Dict[str, Dict] = {}
+    for url, status, validators in checks:
+        if status in ("not_modified", "unchanged"):
+            summary["hits"] += 1
+            entry = store.get(url)
+            if status == "not_modified":
+                summary["not_modified"] += 1
+                summary["bytes_avoided"] += entry.get("content_length") or 0
+            else:
+                entry.update(validators)
+        else:
+            summary["misses"] += 1
+            summary[status] += 1
+            to_scrape.append(url)
+            validators_by_url[url] = validators
+
+    # With review harvesting the JSON Lines output is written afterwards, so it holds the harvested reviews
+    jsonl_output = scrape_options.pop("jsonl_output", None) if review_fetcher is not None else None
+    fresh = await scrape_multiple_urls(to_scrape, output_dir, pool, **scrape_options) if to_scrape else []
+    if review_fetcher is not None and fresh:
+        stored_by_url = {}
+        for product in fresh:
+            entry = store.get(product["url"])
+            if entry is not None:
+                stored_by_url[product["url"]] = entry["product"].get("Reviews", {}).get("individual_reviews", [])
+        await harvest_reviews(fresh, review_fetcher, stored_by_url=stored_by_url)
+    if jsonl_output is not None:
+        save_to_jsonl(fresh, jsonl_output)
+    fresh_by_url = {product["url"]: product for product in fresh}
+    for url, product in fresh_by_url.items():
+        store.update(url, product, validators_by_url.get(url))
+    store.save()
+
+    print(f"Incremental crawl: {summary}")
     results = []
     for url in urls:
-        print(f"Scraping {url}...")
-        result = await scrape_and_extract_details(url, output_dir)
-        # Only add to results if not an empty dict
-        if result:
-            results.append(result)
-        else:
-            print(f"Skipped {url} because scrape returned empty result.")
+        if url in fresh_by_url:
+            results.append(fresh_by_url[url])
+        elif url not in validators_by_url and store.get(url):
+            results.append(store.get(url)["product"])
     return results
 
+
+async def crawl_from_frontier(
+    frontier: CrawlFrontier,
+    output_dir: str,
+    pool: Optional[BrowserPool] = None,
+    batch_size: int = 20,
+    max_urls: Optional[int] = None,
+    jsonl_output: Optional[str] = None,
+    review_fetcher: Optional[PageFetcher] = None,
+    **scrape_options,
+) -> List[Dict]:
+    """
+    Crawls the URLs of a persistent frontier (see crawl_frontier) until it has
+    none left to lease, or `max_urls` have been leased. Each leased batch goes
+    through scrape_multiple_urls with scrape_options; URLs that come back with a
+    product are marked done, the rest count a failure (with the failure policy's
+    dead-letter reason when there is one). Several processes can run this on
+    the same frontier file at once without crawling a URL twice: while a batch
+    is being scraped its leases are renewed, so they never expire under it. With a
+    review_fetcher, each batch's reviews are harvested beyond the first page (see
+    harvest_reviews) before the batch is written. Products are written to
+    `jsonl_output` batch by batch; with `collect=False` they are only written
+    there and an empty list is returned, so memory does not grow with the crawl.
+    Each process needs its own output_dir and jsonl_output: both are rewritten
+    by the process that opens them.
+    """
+    collect = scrape_options.pop("collect", True)
+    failure_policy = scrape_options.setdefault("failure_policy", FailurePolicy())
+    results: List[Dict] = []
+    leased = 0
+    with JsonlWriter(jsonl_output) if jsonl_output is not None else nullcontext() as writer:
+        while max_urls is None or leased < max_urls:
+            urls = frontier.lease(batch_size if max_urls is None else min(batch_size, max_urls - leased))
+            if not urls:
+                break
+            leased += len(urls)
+            renewing = asyncio.ensure_future(_renew_leases(frontier, urls))
+            try:
+                batch = await scrape_multiple_urls(urls, output_dir, pool, **scrape_options)
+            except BaseException:
+                frontier.release(urls)
+                raise
+            finally:
+                renewing.cancel()
+
+            scraped = {product["url"] for product in batch}
+            reasons = {entry["url"]: entry["reason"] for entry in failure_policy.dead_letters.entries}
+            for url in urls:
+                if url in scraped:
+                    frontier.complete(url)
+                else:
+                    frontier.fail(url, reasons.get(url, "no product extracted"))
+            if review_fetcher is not None:
+                await harvest_reviews(batch, review_fetcher)
+            if writer is not None:
+                for product in batch:
+                    writer.write(product)
+            if collect:
+                results.extend(batch)
+            print(f"Frontier: {frontier.stats()}")
+    return results
+
+async def _renew_leases(frontier: CrawlFrontier, urls: List[str]):
+    """Renews a batch's leases every third of the lease time until cancelled."""
+    while True:
+        await asyncio.sleep(frontier.lease_seconds / 3)
+        frontier.renew(urls)
+
 # async def scrape_multiple_urls(urls: List[str], output_dir: str) -> List[Dict]:
 #     """
 #     Scrapes multiple URLs and returns a list of extracted product details.
@@ -245,66 +608,28 @@ async def scrape_multiple_urls(urls: List[str], output_dir: str) -> List[Dict]:
 #     df.to_excel(output_file, index=False)
 #     print(f"Data saved to {output_file}")
 
-def save_to_excel(results: List[Dict], output_file: str):
+def save_to_excel(results: Iterable[Dict], output_file: str):
     """
     Saves the scraped data to an Excel file, flattening nested structures
     and storing all individual reviews in one column (one row per product).
     """
-    excel_data = []
-    for result in results:
-        # Base fields for this product
-        row = {
-            "URL": result.get("url", ""),
-            "Editor's Notes": result.get("Editor's Notes", ""),
-            "Images": ", ".join(result.get("Images", [])),
-            "Overall Rating": result.get("Reviews", {}).get("overall_rating", ""),
-            "Number of Reviews": result.get("Reviews", {}).get("number_of_reviews", "")
-        }
-
-        # Add other product-specific keys (e.g., Size, Materials, etc.)
-        for key, value in result.items():
-            if key not in ["url", "Editor's Notes", "Images", "Reviews"]:
-                row[key] = ", ".join(value) if isinstance(value, list) else value
-
-        # Aggregate all individual reviews into one string
-        individual_reviews = result.get("Reviews", {}).get("individual_reviews", [])
-        review_strings = []
-        for review in individual_reviews:
-            # Customize this formatting as needed
-            reviewer = review.get("reviewer", "")
-            date = review.get("date", "")
-            rating = review.get("rating", "")
-            title = review.get("title", "")
-            description = review.get("description", "")
-            recommend = review.get("recommend", "")
-            thumbs_up = review.get("thumbs_up", 0)
-            thumbs_down = review.get("thumbs_down", 0)
-
-            # Example: combine fields into a single-line summary for each review
-            single_review = (
-                f"{reviewer} ({date}) rated {rating}:\n"
-                f"Title: {title}\n"
-                f"Description: {description}\n"
-                f"Recommend: {recommend}, Thumbs Up: {thumbs_up}, Thumbs Down: {thumbs_down}"
-            )
-            review_strings.append(single_review)
-
-        # Join all review summaries with a blank line between them
-        row["All Reviews"] = "\n\n".join(review_strings)
-
-        excel_data.append(row)
+    export_products(results, [output_file])
+    print(f"Data saved to {output_file}")
 
-    # Create DataFrame and save to Excel
-    df = pd.DataFrame(excel_data)
-    df.to_excel(output_file, index=False)
+def save_to_json(results: Iterable[Dict], output_file: str):
+    """
+    Saves the scraped data to a JSON file, streaming one product at a time.
+    """
+    write_json_array(results, output_file)
     print(f"Data saved to {output_file}")
 
-def save_to_json(results: List[Dict], output_file: str):
+def save_to_jsonl(results: Iterable[Dict], output_file: str):
     """
-    Saves the scraped data to a JSON file.
+    Saves the scraped data to a JSON Lines file, one product per line.
     """
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(results, f, indent=4, ensure_ascii=False)
+    with JsonlWriter(output_file) as writer:
+        for result in results:
+            writer.write(result)
     print(f"Data saved to {output_file}")
 
 if __name__ == "__main__":
@@ -315,18 +640,58 @@ if __name__ == "__main__":
     #     "https://www.coach.com/products/soft-empire-carryall-bag-48/CW617-B4MER.html?rrec=true"
     # ]
 
-    target_url = "https://www.coach.com/shop/women/view-all"
-    target_urls = asyncio.run(scrape_product_links(target_url))
-    
-    print(f"\nFound {len(target_urls)} unique product links:")
-    target_urls = target_urls[:10]
-    
-    output_dir = "scraped_data"
-    excel_output = "product_details.xlsx"
-    json_output = "product_details.json"
+    # Category listings to discover products from; products listed in several are crawled once
+    category_urls = [
+        "https://www.coach.com/shop/women/view-all",
+        "https://www.coach.com/shop/men/view-all",
+    ]
+    # "sitemaps" reads the product URLs from the site's robots.txt/sitemaps instead of rendering the listings
+    discovery = "listings"
+    sitemap_sources = ["https://www.coach.com/robots.txt"]
+    data_dir = "scraped_data"
+    # Discovered URLs with their crawl state, kept across runs and shared by every worker
+    frontier_path = os.path.join(data_dir, "frontier.sqlite")
+    # More scraper processes can work through the same frontier when each gets its own SCRAPER_WORKER
+    # name: the HTML archive and the output files are rewritten by whoever opens them, so they are per worker
+    worker = os.getenv("SCRAPER_WORKER")
+    output_dir = os.path.join(data_dir, f"worker-{worker}") if worker else data_dir
+    output_suffix = f".{worker}" if worker else ""
+    # URLs that still fail after every retry are listed here for the next run
+    failure_policy = FailurePolicy(dead_letter_path=os.path.join(output_dir, "dead_letters.jsonl"))
+    # Keep the HTML archive under 1 GB
+    get_archive(output_dir, max_bytes=1024 ** 3)
+    excel_output = f"product_details{output_suffix}.xlsx"
+    json_output = f"product_details{output_suffix}.json"
+    # Products are streamed here as they finish, so the processing service can start early
+    jsonl_output = f"product_details{output_suffix}.jsonl"
+
+    async def run_pipeline() -> List[Dict]:
+        # One pool serves both link discovery and product scraping
+        async with BrowserPool(max_pages_per_context=4) as pool:
+            if discovery == "sitemaps":
+                discovered = await SitemapDiscovery().discover(sitemap_sources)
+            else:
+                discovered = await discover_product_links(category_urls, pool, concurrency=2)
+            print(f"\nFound {len(discovered)} unique product links")
+
+            with CrawlFrontier(frontier_path) as frontier:
+                print(f"{frontier.add_all(discovered)} new URLs added to the frontier")
+                results = await crawl_from_frontier(
+                    frontier, output_dir, pool,
+                    max_urls=10,
+                    concurrency=4,
+                    parse_workers=2,
+                    jsonl_output=jsonl_output,
+                    failure_policy=failure_policy,
+                    # Reviews beyond the first page: pass review_fetcher=review_harvester.browser_review_fetcher(pool)
+                    # once the site's product profile has a review_pages URL template taken from its review widget
+                )
+            return results
 
     # Run the scraper
-    extracted_data = asyncio.run(scrape_multiple_urls(target_urls, output_dir))
+    extracted_data = asyncio.run(run_pipeline())
+
+    print(f"Page readiness: {default_readiness.summary()}")
 
     # Save to Excel and JSON
     save_to_excel(extracted_data, excel_output)
@@ -0,0 +1,98 @@
+"""
+Re-runs product extraction over saved HTML snapshots without a browser.
+Reads the scraper's HTML archive (index.jsonl, see html_archive) as well as
+legacy scraped_page_*.html files.
+
+    python offline_extractor.py scraped_data -o product_details_reextracted.json --workers 8
+"""
+import argparse
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from extraction_profiles import load_profile
+from html_archive import HtmlArchive, read_snapshot
+from product_parser import extract_product_details
+
+
+# (snapshot path, product URL when known)
+Snapshot = Tuple[str, Optional[str]]
+
+
+def find_snapshots(directory: str) -> List[Snapshot]:
+    """
+    Returns every snapshot under the directory: each URL's latest archived snapshot, with its
+    URL from the archive index, followed by legacy scraped_page_*.html files sorted by name.
+    """
+    snapshots: List[Snapshot] = []
+    if os.path.exists(os.path.join(directory, "index.jsonl")):
+        archive = HtmlArchive(directory)
+        snapshots.extend((os.path.join(directory, path), url) for url, path in archive.latest())
+    legacy = glob.glob(os.path.join(directory, "**", "scraped_page_*.html"), recursive=True)
+    snapshots.extend((path, None) for path in sorted(legacy))
+    return snapshots
+
+
+def snapshot_url(content: str) -> Optional[str]:
+    """Recovers the product URL from a snapshot's canonical link or og:url meta tag."""
+    profile = load_profile("product")
+    backend = profile.backend
+    root = backend.parse(content)
+    canonical = backend.select_one(root, profile["canonical_url"])
+    if canonical is not None and backend.attr(canonical, "href"):
+        return backend.attr(canonical, "href")
+    og_url = backend.select_one(root, profile["og_url"])
+    if og_url is not None and backend.attr(og_url, "content"):
+        return backend.attr(og_url, "content")
+    return None
+
+
+def extract_snapshot(path: str, url: Optional[str] = None) -> Dict:
+    """Extracts one snapshot; runs in a worker process."""
+    content = read_snapshot(path)
+    product_details = extract_product_details(content, url or snapshot_url(content) or path)
+    product_details["snapshot"] = path
+    return product_details
+
+
+def reextract_snapshots(snapshots: List[Snapshot], workers: Optional[int] = None, chunksize: int = 16) -> List[Dict]:
+    """
+    Extracts every snapshot across a process pool and returns the results in input order.
+    A snapshot that fails to parse is reported and skipped, like a failed scrape.
+    """
+    if workers == 1:
+        return [r for r in map(_extract_or_empty, snapshots) if r]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [r for r in executor.map(_extract_or_empty, snapshots, chunksize=chunksize) if r]
+
+
+def _extract_or_empty(snapshot: Snapshot) -> Dict:
+    path, url = snapshot
+    try:
+        return extract_snapshot(path, url)
+    except Exception as e:
+        print(f"Error Processing {path}: ", e)
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-extract product details from saved HTML snapshots.")
+    parser.add_argument("snapshot_dir", help="Scraper output directory (HTML archive or scraped_page_*.html files)")
+    parser.add_argument("-o", "--output", default="product_details_reextracted.json")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    snapshots = find_snapshots(args.snapshot_dir)
+    start = time.perf_counter()
+    results = reextract_snapshots(snapshots, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4, ensure_ascii=False)
+    print(f"Re-extracted {len(results)}/{len(snapshots)} snapshots in {elapsed:.2f}s. Data saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
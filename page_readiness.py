@@ -0,0 +1,110 @@
+import asyncio
+import collections
+import time
+from typing import Deque, Dict, List, NamedTuple, Optional
+from playwright.async_api import Page, TimeoutError as PlaywrightTimeoutError
+from extraction_profiles import read_profile
+
+
+class ReadySelector(NamedTuple):
+    name: str
+    css: str
+    timeout: float  # seconds
+    required: bool = True
+
+
+# Selectors scrape_and_extract_details reads from a product page, taken from the product profile
+_product_css = read_profile("product")["selectors"]
+PRODUCT_READY_SELECTORS = [
+    ReadySelector("title", _product_css["product_name"], 15.0),
+    ReadySelector("details", _product_css["details_container"], 15.0),
+    ReadySelector("images", _product_css["image_container"], 10.0),
+    # Products without reviews never render the list, so don't hold the page for it
+    ReadySelector("reviews", _product_css["review_items"], 4.0, required=False),
+]
+
+
+class ReadinessStrategy:
+    """
+    Waits until the selectors the extractor needs are attached to the page,
+    instead of sleeping for a fixed time.
+
+    All selectors are awaited in parallel, each with its own timeout. Once the
+    required ones are settled, optional selectors get at most
+    `optional_grace` more seconds and are then given up on, so a product
+    without reviews is not held for the reviews timeout. If a required
+    selector does not appear in time, the strategy sleeps for
+    `fallback_delay` seconds before letting extraction continue with whatever
+    has rendered. Totals over every page are kept as running counters; the
+    timing records of only the last `keep_records` pages are kept in `records`,
+    so a strategy shared by a long crawl stays small.
+    """
+
+    def __init__(
+        self,
+        selectors: Optional[List[ReadySelector]] = None,
+        fallback_delay: float = 2.0,
+        optional_grace: float = 0.5,
+        keep_records: int = 1000,
+    ):
+        self.selectors = selectors if selectors is not None else PRODUCT_READY_SELECTORS
+        self.fallback_delay = fallback_delay
+        self.optional_grace = optional_grace
+        self.records: Deque[Dict] = collections.deque(maxlen=keep_records)
+        self.pages = 0
+        self.fallbacks = 0
+        self.total_ready_seconds = 0.0
+        self.max_ready_seconds = 0.0
+
+    async def _wait_for(self, page: Page, selector: ReadySelector, start: float) -> Optional[float]:
+        try:
+            await page.wait_for_selector(selector.css, state="attached", timeout=selector.timeout * 1000)
+        except PlaywrightTimeoutError:
+            return None
+        return time.perf_counter() - start
+
+    async def wait(self, page: Page, url: str) -> Dict:
+        """Blocks until the page is ready and returns this page's timing record."""
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(self._wait_for(page, s, start)) for s in self.selectors]
+        optional = [task for s, task in zip(self.selectors, tasks) if not s.required]
+        try:
+            await asyncio.gather(*(task for s, task in zip(self.selectors, tasks) if s.required))
+            if optional:
+                await asyncio.wait(optional, timeout=self.optional_grace)
+        finally:
+            for task in tasks:
+                task.cancel()
+        timings = [task.result() if task.done() and not task.cancelled() else None for task in tasks]
+        selector_times = {s.name: t for s, t in zip(self.selectors, timings)}
+
+        missing = [s.name for s, t in zip(self.selectors, timings) if t is None and s.required]
+        if missing:
+            print(f"Selectors {missing} not ready for {url}, falling back to {self.fallback_delay}s wait")
+            await asyncio.sleep(self.fallback_delay)
+
+        record = {
+            "url": url,
+            "ready_seconds": round(time.perf_counter() - start, 3),
+            "selectors": selector_times,
+            "missing": missing,
+        }
+        self.records.append(record)
+        self.pages += 1
+        self.fallbacks += bool(missing)
+        self.total_ready_seconds += record["ready_seconds"]
+        self.max_ready_seconds = max(self.max_ready_seconds, record["ready_seconds"])
+        return record
+
+    def summary(self) -> Dict:
+        """Aggregate readiness timings across all pages seen so far (the median over the recent `records`)."""
+        if not self.pages:
+            return {"pages": 0}
+        recent = sorted(r["ready_seconds"] for r in self.records)
+        return {
+            "pages": self.pages,
+            "mean_ready_seconds": round(self.total_ready_seconds / self.pages, 3),
+            "p50_ready_seconds": recent[len(recent) // 2],
+            "max_ready_seconds": self.max_ready_seconds,
+            "fallbacks": self.fallbacks,
+        }
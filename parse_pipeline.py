@@ -0,0 +1,106 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+from product_parser import extract_product_details
+
+
+class StageStats:
+    """Item count, busy time and wall-clock span of one pipeline stage."""
+
+    def __init__(self):
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    def record(self, start: float, end: float):
+        self.items += 1
+        self.busy_seconds += end - start
+        if self.first_start is None or start < self.first_start:
+            self.first_start = start
+        if self.last_end is None or end > self.last_end:
+            self.last_end = end
+
+    def summary(self) -> Dict:
+        wall = (self.last_end - self.first_start) if self.items else 0.0
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wall_seconds": round(wall, 3),
+            "items_per_second": round(self.items / wall, 2) if wall else None,
+        }
+
+
+class ParsePipeline:
+    """
+    Parsing stage that runs extraction on a process pool, off the event loop.
+
+    Fetchers hand raw HTML to `submit`, which waits while the bounded queue is
+    full (so slow parsing applies back-pressure to fetching) and returns a future
+    for the product dict. `workers` consumer tasks feed the queue into the
+    process pool. Fetch and parse throughput are tracked separately in
+    `fetch_stats` and `parse_stats`; fetchers record into `fetch_stats` themselves.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        queue_size: int = 32,
+        parse_fn: Callable[[str, str], Dict] = extract_product_details,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.parse_fn = parse_fn
+        self.fetch_stats = StageStats()
+        self.parse_stats = StageStats()
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._consumers: List[asyncio.Task] = []
+
+    async def __aenter__(self) -> "ParsePipeline":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._consumers = [asyncio.create_task(self._consume()) for _ in range(self.workers)]
+
+    async def close(self):
+        """Drains the queue, stops the consumers and shuts the process pool down."""
+        for _ in self._consumers:
+            await self._queue.put(None)
+        await asyncio.gather(*self._consumers, return_exceptions=True)
+        self._consumers = []
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    async def submit(self, url: str, content: str) -> asyncio.Future:
+        """Queues a page for parsing and returns a future resolving to its product dict."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((url, content, future))
+        return future
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            url, content, future = item
+            start = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(self._executor, self.parse_fn, content, url)
+            except Exception as e:
+                print(f"Error Processing {url}: ", e)
+                result = {}
+            self.parse_stats.record(start, time.perf_counter())
+            if not future.done():
+                future.set_result(result)
+
+    def summary(self) -> Dict:
+        return {"fetch": self.fetch_stats.summary(), "parse": self.parse_stats.summary()}
@@ -0,0 +1,236 @@
+import csv
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import xlsxwriter
+except ImportError:  # pandas/openpyxl is used for Excel instead
+    xlsxwriter = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # only needed for Parquet output
+    pyarrow = None
+
+# Columns that always come first, in this order: (column name, product key)
+LEADING_COLUMNS = [
+    ("URL", "url"),
+    ("Editor's Notes", "Editor's Notes"),
+    ("Images", "Images"),
+    ("Overall Rating", "Reviews.overall_rating"),
+    ("Number of Reviews", "Reviews.number_of_reviews"),
+    ("Product Description", "Product Description"),
+    ("Luxury Tagline", "Luxury Tagline"),
+]
+REVIEWS_COLUMN = "All Reviews"
+# Longest text an Excel cell holds; longer values (big review blobs) are cut to fit
+EXCEL_CELL_LIMIT = 32767
+TRUNCATED_MARKER = " [truncated]"
+# Product keys covered by the leading columns or the reviews column
+_HANDLED_KEYS = {"url", "Editor's Notes", "Images", "Reviews", "Product Description", "Luxury Tagline"}
+
+REVIEW_TEMPLATE = (
+    "{reviewer} ({date}) rated {rating}:\n"
+    "Title: {title}\n"
+    "Description: {description}\n"
+    "Recommend: {recommend}, Thumbs Up: {thumbs_up}, Thumbs Down: {thumbs_down}"
+)
+
+
+def format_value(value):
+    """Turns a product field into a single cell: lists are comma-joined, dicts become JSON."""
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    if isinstance(value, dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def format_reviews(reviews: List[Dict]) -> str:
+    """All of a product's individual reviews in one cell, separated by blank lines."""
+    return "\n\n".join(
+        REVIEW_TEMPLATE.format(
+            reviewer=review.get("reviewer", ""),
+            date=review.get("date", ""),
+            rating=review.get("rating", ""),
+            title=review.get("title", ""),
+            description=review.get("description", ""),
+            recommend=review.get("recommend", ""),
+            thumbs_up=review.get("thumbs_up", 0),
+            thumbs_down=review.get("thumbs_down", 0),
+        )
+        for review in reviews
+    )
+
+
+class ProductTable:
+    """
+    Products flattened into columns, one row per product.
+
+    The leading columns come first (URL is always present, the others only when
+    some product has them), then every other product field in the order it was
+    first seen, then "All Reviews". Each column is a plain list of cell values;
+    None marks a product that does not have the field. Columns named in
+    `exclude` are left out.
+
+    Usage:
+        table = ProductTable.from_products(products)
+        write_excel(table, "products.xlsx")
+        write_csv(table, "products.csv")
+    """
+
+    def __init__(self, exclude: Iterable[str] = ()):
+        self.columns: Dict[str, List] = {}
+        self.rows = 0
+        self.exclude = set(exclude)
+
+    @classmethod
+    def from_products(cls, products: Iterable[Dict], exclude: Iterable[str] = ()) -> "ProductTable":
+        table = cls(exclude)
+        for product in products:
+            table.add(product)
+        return table
+
+    def add(self, product: Dict):
+        reviews = product.get("Reviews") or {}
+        for column, key in LEADING_COLUMNS:
+            if key.startswith("Reviews."):
+                value = reviews.get(key[len("Reviews."):])
+            else:
+                value = product.get(key)
+            if value is not None or column == "URL":
+                self._set(column, format_value(value if value is not None else ""))
+
+        for key, value in product.items():
+            if key in _HANDLED_KEYS or isinstance(value, dict):
+                continue
+            self._set(key, format_value(value))
+
+        self._set(REVIEWS_COLUMN, format_reviews(reviews.get("individual_reviews", [])))
+        self.rows += 1
+        for values in self.columns.values():
+            if len(values) == self.rows - 1:
+                values.append(None)
+
+    def _set(self, column: str, value):
+        if column in self.exclude:
+            return
+        values = self.columns.get(column)
+        if values is None:
+            values = self.columns[column] = [None] * self.rows
+        values.append(value)
+
+    def header(self) -> List[str]:
+        leading = [column for column, _ in LEADING_COLUMNS if column in self.columns]
+        other = [c for c in self.columns if c not in leading and c != REVIEWS_COLUMN]
+        return leading + other + ([REVIEWS_COLUMN] if REVIEWS_COLUMN in self.columns else [])
+
+    def iter_rows(self) -> Iterator[List]:
+        columns = [self.columns[name] for name in self.header()]
+        for i in range(self.rows):
+            yield [values[i] for values in columns]
+
+
+def excel_text(value: str) -> str:
+    """Cuts text to what an Excel cell can hold, marking the cut."""
+    if len(value) <= EXCEL_CELL_LIMIT:
+        return value
+    return value[:EXCEL_CELL_LIMIT - len(TRUNCATED_MARKER)] + TRUNCATED_MARKER
+
+
+def write_excel(table: ProductTable, output_file: str):
+    """
+    Writes the table with xlsxwriter in constant-memory mode, which flushes each
+    row to disk as soon as the next one starts. Scraped text is always written
+    as text (a value starting with "=" never becomes a formula) and cut to
+    Excel's cell limit. Falls back to pandas when xlsxwriter is not installed.
+    """
+    header = table.header()
+    truncated = 0
+
+    def cell(value):
+        nonlocal truncated
+        if isinstance(value, str) and len(value) > EXCEL_CELL_LIMIT:
+            truncated += 1
+            return excel_text(value)
+        return value
+
+    if xlsxwriter is None:
+        import pandas as pd
+        rows = [[cell(value) for value in row] for row in table.iter_rows()]
+        pd.DataFrame(rows, columns=header).to_excel(output_file, index=False)
+    else:
+        workbook = xlsxwriter.Workbook(
+            output_file, {"constant_memory": True, "strings_to_urls": False, "strings_to_formulas": False}
+        )
+        try:
+            sheet = workbook.add_worksheet()
+            bold = workbook.add_format({"bold": True})
+            sheet.write_row(0, 0, header, bold)
+            for row_number, row in enumerate(table.iter_rows(), start=1):
+                for col_number, value in enumerate(row):
+                    if value is None:
+                        continue
+                    if isinstance(value, str):
+                        status = sheet.write_string(row_number, col_number, cell(value))
+                    else:
+                        status = sheet.write(row_number, col_number, value)
+                    if status < 0:
+                        print(f"Excel cell {row_number},{col_number} of {output_file} not written (code {status})")
+        finally:
+            workbook.close()
+    if truncated:
+        print(f"{truncated} cells in {output_file} were cut to Excel's {EXCEL_CELL_LIMIT} character limit")
+
+
+def write_csv(table: ProductTable, output_file: str):
+    """Writes the table as UTF-8 CSV, one row at a time."""
+    with open(output_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(table.header())
+        for row in table.iter_rows():
+            writer.writerow(["" if value is None else value for value in row])
+
+
+def _arrow_column(values: List):
+    try:
+        return pyarrow.array(values)
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        # Mixed types (e.g. a rating that is sometimes a number, sometimes text)
+        return pyarrow.array([None if value is None else str(value) for value in values])
+
+
+def write_parquet(table: ProductTable, output_file: str):
+    """Writes the table as a Parquet file straight from its columns (needs pyarrow)."""
+    if pyarrow is None:
+        raise ImportError("Parquet output needs the pyarrow package")
+    header = table.header()
+    arrow_table = pyarrow.table({name: _arrow_column(table.columns[name]) for name in header})
+    pyarrow.parquet.write_table(arrow_table, output_file)
+
+
+WRITERS = {
+    ".xlsx": write_excel,
+    ".csv": write_csv,
+    ".parquet": write_parquet,
+}
+
+
+def export_products(
+    products: Iterable[Dict], output_files: List[str], exclude: Optional[Iterable[str]] = None
+) -> ProductTable:
+    """
+    Flattens the products once and writes every requested file, picking the
+    format from each file's extension (.xlsx, .csv or .parquet). Columns named
+    in `exclude` are left out of every file.
+    """
+    for output_file in output_files:
+        ext = os.path.splitext(output_file)[1].lower()
+        if ext not in WRITERS:
+            raise ValueError(f"Unsupported export format {ext!r} for {output_file}")
+    table = ProductTable.from_products(products, exclude or ())
+    for output_file in output_files:
+        WRITERS[os.path.splitext(output_file)[1].lower()](table, output_file)
+    return table
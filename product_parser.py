@@ -0,0 +1,193 @@
+import json
+from typing import Dict, List, Optional
+from extraction_profiles import CompiledProfile, profile_for_url
+
+
+def extract_product_details(content: str, url: str, profile: Optional[CompiledProfile] = None) -> Dict:
+    """
+    Extracts product details, images, and reviews from a product page's HTML.
+    Every field is read with one targeted, precompiled selector from the site's product
+    profile (profiles/<site>/product.json, see extraction_profiles), through that profile's
+    parser backend (see html_backends; lxml when installed).
+    Pure function of the HTML, so it runs the same on a live page, a saved snapshot or in a worker process.
+    """
+    sel = profile or profile_for_url(url, "product")
+    backend = sel.backend
+    root = backend.parse(content)
+
+    def text_of(node, matcher):
+        found = backend.select_one(node, matcher)
+        return backend.text(found) if found is not None else None
+
+    product_details = {"url": url}
+    product_details['product_name'] = text_of(root, sel["product_name"])
+
+    # Extract product price
+    product_details['price'] = text_of(root, sel["price"])
+
+    if backend.select_one(root, sel["details_container"]) is None:
+        print(f"Product details section not found for {url}")
+        return product_details
+
+    # Extract detail sections (e.g., Size, Materials)
+    for section in backend.select(root, sel["detail_sections"]):
+        header = text_of(section, sel["section_header"])
+        if header is None:
+            continue
+        items = [backend.text(li) for li in backend.select(section, sel["section_items"])]
+        product_details[header] = items
+
+    # Extract Editor's Notes
+    editor_section = backend.select_one(root, sel["editor_section"])
+    if editor_section is not None:
+        notes = text_of(editor_section, sel["editor_notes"])
+        if notes is not None:
+            product_details["Editor's Notes"] = notes
+
+    # Extract image URLs from splide container
+    if backend.select_one(root, sel["image_container"]) is not None:
+        sources = (backend.attr(img, "src") for img in backend.select(root, sel["images"]))
+        product_details["Images"] = list(dict.fromkeys(src for src in sources if src))
+    else:
+        print(f"Splide image container not found for {url}")
+        product_details["Images"] = []
+
+    # Extract overall reviews
+    rating_text = text_of(root, sel["overall_rating"])
+    overall_rating = rating_text.split()[0] if rating_text is not None else None
+    count_text = text_of(root, sel["number_of_reviews"])
+    number_of_reviews = count_text.split()[0] if count_text is not None else None
+
+    # Extract individual reviews
+    individual_reviews = [_parse_review(backend, item, sel["review"]) for item in backend.select(root, sel["review_items"])]
+
+    # Add reviews to product details
+    product_details["Reviews"] = {
+        "overall_rating": overall_rating,
+        "number_of_reviews": number_of_reviews,
+        "individual_reviews": individual_reviews
+    }
+
+    return product_details
+
+
+def _parse_review(backend, review_item, review_sel: CompiledProfile) -> Dict:
+    """Reads one review list item into the review dict used under Reviews.individual_reviews."""
+    def text_of(node, matcher):
+        found = backend.select_one(node, matcher)
+        return backend.text(found) if found is not None else None
+
+    # Extract reviewer's name and date
+    user_info_text = text_of(review_item, review_sel["user_info"])
+    if user_info_text is not None:
+        try:
+            name, date = user_info_text.split(', ', 1)
+        except ValueError:
+            name = user_info_text
+            date = None
+    else:
+        name = None
+        date = None
+
+    # Extract rating from stars
+    if backend.select_one(review_item, review_sel["stars"]) is not None:
+        full_stars = backend.select(review_item, review_sel["full_stars"])
+        half_stars = backend.select(review_item, review_sel["half_stars"])
+        rating = len(full_stars) + 0.5 * len(half_stars)
+    else:
+        rating = None
+
+    # Extract review title and description
+    title = text_of(review_item, review_sel["title"])
+    description = text_of(review_item, review_sel["description"])
+
+    # Extract recommendation
+    recommend_text = text_of(review_item, review_sel["recommend"])
+    if recommend_text is not None:
+        try:
+            recommend = recommend_text.split(': ')[1]
+        except IndexError:
+            recommend = None
+    else:
+        recommend = None
+
+    # Extract helpfulness counts
+    thumbs_up_text = text_of(review_item, review_sel["thumbs_up"])
+    thumbs_up = int(thumbs_up_text) if thumbs_up_text is not None else 0
+
+    thumbs_down_text = text_of(review_item, review_sel["thumbs_down"])
+    thumbs_down = int(thumbs_down_text) if thumbs_down_text is not None else 0
+
+    # Compile individual review
+    return {
+        "reviewer": name,
+        "date": date,
+        "rating": rating,
+        "title": title,
+        "description": description,
+        "recommend": recommend,
+        "thumbs_up": thumbs_up,
+        "thumbs_down": thumbs_down
+    }
+
+
+def extract_reviews(content: str, url: str, profile: Optional[CompiledProfile] = None) -> List[Dict]:
+    """
+    Extracts only the individual reviews from a product page or a review page,
+    with the same review selectors extract_product_details uses.
+    """
+    sel = profile or profile_for_url(url, "product")
+    backend = sel.backend
+    root = backend.parse(content)
+    return [_parse_review(backend, item, sel["review"]) for item in backend.select(root, sel["review_items"])]
+
+
+def _json_ld_products(data):
+    """Yields every schema.org Product object in a JSON-LD document."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _json_ld_products(item)
+    elif isinstance(data, dict):
+        types = data.get("@type")
+        if types == "Product" or (isinstance(types, list) and "Product" in types):
+            yield data
+        for item in data.get("@graph", []):
+            yield from _json_ld_products(item)
+
+
+def extract_embedded_product(content: str, url: str, profile: Optional[CompiledProfile] = None) -> Dict:
+    """
+    Reads name, price and images from the page's schema.org Product JSON-LD, which is
+    present in the server-rendered HTML even when the page's own markup is not.
+    Returns only the fields it found, using the same keys as extract_product_details.
+    """
+    sel = profile or profile_for_url(url, "product")
+    backend = sel.backend
+    root = backend.parse(content)
+    embedded = {}
+
+    for script in backend.select(root, sel["json_ld"]):
+        try:
+            data = json.loads(backend.text(script))
+        except ValueError:
+            continue
+        for product in _json_ld_products(data):
+            if product.get("name") and "product_name" not in embedded:
+                embedded["product_name"] = product["name"]
+
+            offers = product.get("offers") or {}
+            if isinstance(offers, list):
+                offers = offers[0] if offers else {}
+            price = offers.get("price") if isinstance(offers, dict) else None
+            if price is not None and "price" not in embedded:
+                currency = offers.get("priceCurrency")
+                embedded["price"] = f"${price}" if currency in (None, "USD") else f"{price} {currency}"
+
+            images = product.get("image") or []
+            if isinstance(images, (str, dict)):
+                images = [images]
+            urls = [img.get("url") if isinstance(img, dict) else img for img in images]
+            if urls and "Images" not in embedded:
+                embedded["Images"] = list(dict.fromkeys(u for u in urls if u))
+
+    return embedded
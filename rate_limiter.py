@@ -0,0 +1,223 @@
+import asyncio
+import collections
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Optional
+from urllib.parse import urlparse
+
+
+class AdaptiveTokenBucket:
+    """
+    Token bucket for one host whose refill rate adapts to how the host responds
+    (additive increase, multiplicative decrease).
+
+    Every request takes a token; tokens refill at `rate` per second up to
+    `burst`. Each healthy response counts towards raising the rate by
+    `increase` (once per second's worth of requests at the current rate). A
+    429, a 5xx or a failed request cuts the rate by `backoff`; a response-time
+    average that climbs above `latency_factor` times the best average seen so
+    far cuts it more gently. Cuts happen at most once per `decrease_interval`
+    seconds, so a burst of failures from requests already in flight only
+    counts once. The rate always stays within [min_rate, max_rate].
+    """
+
+    def __init__(
+        self,
+        rate: float = 2.0,
+        min_rate: float = 0.2,
+        max_rate: float = 10.0,
+        burst: float = 1.0,
+        increase: float = 0.25,
+        backoff: float = 0.5,
+        latency_factor: float = 2.0,
+        decrease_interval: float = 2.0,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1.0, burst)
+        self.increase = increase
+        self.backoff = backoff
+        self.latency_factor = latency_factor
+        self.decrease_interval = decrease_interval
+        self.tokens = self.burst
+        self.requests = 0
+        self.throttled = 0
+        self.ewma_latency: Optional[float] = None
+        self.best_latency: Optional[float] = None
+        self._healthy = 0
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._waiters: Deque[asyncio.Future] = collections.deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self):
+        """Takes a token, waiting in arrival order when none is left."""
+        self._refill()
+        if not self._waiters and self.tokens >= 1:
+            self.tokens -= 1
+            self.requests += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        if len(self._waiters) == 1:
+            self._schedule()
+        # A cancelled waiter is simply skipped when its turn comes
+        await waiter
+        self.requests += 1
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def _schedule(self):
+        """(Re)arms the timer that hands the next token to the head waiter at the current rate."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._waiters:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._timer = loop.call_later(max(0.0, (1 - self.tokens) / self.rate), self._release)
+
+    def _release(self):
+        self._timer = None
+        self._refill()
+        while self._waiters and self.tokens >= 1:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.tokens -= 1
+            waiter.set_result(None)
+        self._schedule()
+
+    def record(self, latency: Optional[float], status: Optional[int] = None, failed: bool = False):
+        """Feeds one response (or failure) back into the rate."""
+        if failed or is_throttled(status):
+            self.throttled += 1
+            self._decrease(self.backoff)
+            return
+
+        if latency is not None:
+            self.ewma_latency = latency if self.ewma_latency is None else 0.8 * self.ewma_latency + 0.2 * latency
+            if self.best_latency is None or self.ewma_latency < self.best_latency:
+                self.best_latency = self.ewma_latency
+            # The floor keeps near-instant responses (cache hits, 304s) from making every later one look slow
+            if self.ewma_latency > max(self.best_latency, 0.05) * self.latency_factor:
+                self._decrease((1 + self.backoff) / 2)
+                return
+
+        self._healthy += 1
+        if self._healthy >= max(1.0, self.rate):
+            self._healthy = 0
+            self.rate = min(self.max_rate, self.rate + self.increase)
+            self._schedule()
+
+    def _decrease(self, factor: float):
+        self._healthy = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_interval:
+            return
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * factor)
+        self._schedule()
+
+    def metrics(self) -> Dict:
+        return {
+            "rate": round(self.rate, 3),
+            "queue_depth": self.queue_depth,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "ewma_latency": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+        }
+
+
+class HostRateLimiter:
+    """
+    One AdaptiveTokenBucket per host, created on first use with `bucket_settings`.
+
+    Usage:
+        async with limiter.limit(url) as request:
+            response = await page.goto(url)
+            request["status"] = response.status if response else None
+    """
+
+    def __init__(self, **bucket_settings):
+        self.bucket_settings = bucket_settings
+        self.buckets: Dict[str, AdaptiveTokenBucket] = {}
+
+    def bucket_for(self, url: str) -> AdaptiveTokenBucket:
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = AdaptiveTokenBucket(**self.bucket_settings)
+        return self.buckets[host]
+
+    @asynccontextmanager
+    async def limit(self, url: str) -> AsyncIterator[Dict]:
+        """
+        Waits for the host's token, then times the block. Set "status" on the
+        yielded dict to report the response status; an exception escaping the
+        block is recorded as a failed request.
+        """
+        bucket = self.bucket_for(url)
+        await bucket.acquire()
+        request: Dict = {"status": None}
+        start = time.perf_counter()
+        try:
+            yield request
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            bucket.record(time.perf_counter() - start, failed=True)
+            raise
+        bucket.record(time.perf_counter() - start, request["status"])
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Current rate, queue depth and counters per host."""
+        return {host: bucket.metrics() for host, bucket in self.buckets.items()}
+
+
+_shared_limiter: Optional[HostRateLimiter] = None
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """The process-wide limiter, so link discovery, page scraping and HTTP fetches pace each host together."""
+    global _shared_limiter
+    if _shared_limiter is None:
+        _shared_limiter = HostRateLimiter()
+    return _shared_limiter
+
+
+class ThrottledError(Exception):
+    """The host answered with 429 or a 5xx."""
+
+    def __init__(self, url: str, status: int):
+        super().__init__(f"HTTP {status} for {url}")
+        self.url = url
+        self.status = status
+
+
+def is_throttled(status: Optional[int]) -> bool:
+    return status is not None and (status == 429 or status >= 500)
+
+
+async def paced_goto(page, url: str, limiter: Optional[HostRateLimiter] = None, **goto_options):
+    """
+    page.goto under the host's rate limit, reporting the response status and time back
+    to it. Raises ThrottledError on a 429/5xx so the caller's retry policy can back off.
+    """
+    limiter = limiter or get_rate_limiter()
+    async with limiter.limit(url) as request:
+        response = await page.goto(url, **goto_options)
+        request["status"] = response.status if response is not None else None
+    if is_throttled(request["status"]):
+        raise ThrottledError(url, request["status"])
+    return response
@@ -0,0 +1,212 @@
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+from playwright.async_api import Page, Route, Response
+
+# Rough transfer sizes used to estimate what an aborted request would have cost
+ESTIMATED_BYTES_BY_TYPE = {
+    "image": 80_000,
+    "media": 500_000,
+    "font": 40_000,
+    "stylesheet": 30_000,
+    "script": 40_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_ESTIMATED_BYTES = 10_000
+
+# URL patterns (Chromium wildcards) per resource type, for blocking inside the
+# browser, where a request's type is not known yet. Scene7 serves Coach's
+# product images from /is/image/ paths without a file extension.
+RESOURCE_TYPE_URL_PATTERNS = {
+    "image": ("jpg", "jpeg", "png", "gif", "webp", "avif", "svg", "ico", "bmp", "/is/image/"),
+    "media": ("mp4", "webm", "m4v", "mov", "mp3", "m4a", "m3u8"),
+    "font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "stylesheet": ("css",),
+    "script": ("js",),
+}
+
+# Analytics and ad hosts that never contribute to the product markup
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "clarity.ms",
+    "bing.com",
+    "tiktok.com",
+    "pinterest.com",
+    "criteo.com",
+    "quantummetric.com",
+    "demdex.net",
+    "omtrdc.net",
+)
+
+
+def _matches(host: str, domains: Iterable[str]) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class RequestPolicy:
+    """
+    Allow/deny rules for requests made while scraping.
+
+    A request is aborted when its resource type is in `blocked_resource_types`,
+    when its host is in `blocked_domains`, or, with `block_third_party` enabled,
+    when its host is neither first-party nor in `allowed_domains`. Hosts in
+    `allowed_domains` are never blocked by domain rules.
+
+    Policies without third-party blocking or allowed domains can also be
+    written as URL patterns (see url_patterns), which the browser applies
+    itself; the others need every request routed through Playwright.
+    """
+
+    def __init__(
+        self,
+        blocked_resource_types: Iterable[str] = ("image", "media", "font"),
+        first_party_domains: Iterable[str] = ("coach.com",),
+        allowed_domains: Iterable[str] = (),
+        blocked_domains: Iterable[str] = TRACKER_DOMAINS,
+        block_third_party: bool = False,
+    ):
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.first_party_domains = tuple(first_party_domains)
+        self.allowed_domains = tuple(allowed_domains)
+        self.blocked_domains = tuple(blocked_domains)
+        self.block_third_party = block_third_party
+
+    def block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """Returns why the request should be aborted, or None to let it through."""
+        if resource_type in self.blocked_resource_types:
+            return resource_type
+        host = urlparse(url).hostname or ""
+        if not host or _matches(host, self.allowed_domains):
+            return None
+        if _matches(host, self.blocked_domains):
+            return "blocked_domain"
+        if self.block_third_party and not _matches(host, self.first_party_domains):
+            return "third_party"
+        return None
+
+
+    def url_patterns(self) -> Optional[List[str]]:
+        """
+        The policy as Chromium URL patterns, or None when it cannot be written as
+        patterns (third-party blocking and allowed domains depend on each host).
+        Resource types are matched by file extension (see RESOURCE_TYPE_URL_PATTERNS),
+        so a type with unusual URLs can slip through; the rest match exactly.
+        """
+        if self.block_third_party or self.allowed_domains:
+            return None
+        patterns = []
+        for resource_type in sorted(self.blocked_resource_types):
+            for ending in RESOURCE_TYPE_URL_PATTERNS.get(resource_type, ()):
+                if ending.startswith("/"):
+                    patterns.append(f"*{ending}*")
+                else:
+                    patterns += [f"*.{ending}", f"*.{ending}?*"]
+        for domain in self.blocked_domains:
+            patterns += [f"*://{domain}/*", f"*://*.{domain}/*"]
+        return patterns
+
+
+DEFAULT_REQUEST_POLICY = RequestPolicy()
+
+
+class RequestFilterStats:
+    """Counts what the filter blocked and let through on a single page."""
+
+    def __init__(self):
+        self.blocked: Dict[str, int] = {}
+        self.estimated_bytes_saved = 0
+        self.allowed_requests = 0
+        self.bytes_loaded = 0
+        # Responses served from the browser's HTTP cache (only counted by the in-browser filter)
+        self.cached_responses = 0
+
+    def report(self, url: str) -> Dict:
+        return {
+            "url": url,
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_by_reason": dict(self.blocked),
+            "estimated_bytes_saved": self.estimated_bytes_saved,
+            "allowed_requests": self.allowed_requests,
+            "bytes_loaded": self.bytes_loaded,
+            "cached_responses": self.cached_responses,
+        }
+
+    def block(self, reason: str, resource_type: str):
+        self.blocked[reason] = self.blocked.get(reason, 0) + 1
+        self.estimated_bytes_saved += ESTIMATED_BYTES_BY_TYPE.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+
+
+async def install_request_filter(page: Page, policy: RequestPolicy) -> RequestFilterStats:
+    """
+    Applies the policy to every request on the page and returns the stats
+    object that is filled in as the page loads.
+
+    When the policy can be written as URL patterns it is handed to the browser
+    over CDP (Network.setBlockedURLs). Playwright routing is only used for
+    policies that need per-host decisions: Playwright turns the HTTP cache off
+    on any page with a route, so routed pages never use the disk cache of the
+    launch profile (see launch_profiles).
+
+    Blocked requests never report a size, so bytes saved are estimated from
+    ESTIMATED_BYTES_BY_TYPE.
+    """
+    patterns = policy.url_patterns()
+    if patterns is not None:
+        return await _install_blocked_urls(page, policy, patterns)
+    return await _install_route(page, policy)
+
+
+async def _install_blocked_urls(page: Page, policy: RequestPolicy, patterns: List[str]) -> RequestFilterStats:
+    """In-browser blocking, which keeps the HTTP cache; bytes loaded are the encoded bytes off the network."""
+    stats = RequestFilterStats()
+    session = await page.context.new_cdp_session(page)
+
+    def on_failed(params: Dict):
+        if not params.get("blockedReason"):
+            return
+        resource_type = params.get("type", "other").lower()
+        stats.block(resource_type if resource_type in policy.blocked_resource_types else "blocked_domain", resource_type)
+
+    def on_response(params: Dict):
+        stats.allowed_requests += 1
+        if params["response"].get("fromDiskCache"):
+            stats.cached_responses += 1
+
+    def on_finished(params: Dict):
+        stats.bytes_loaded += int(params.get("encodedDataLength") or 0)
+
+    session.on("Network.loadingFailed", on_failed)
+    session.on("Network.responseReceived", on_response)
+    session.on("Network.loadingFinished", on_finished)
+    await session.send("Network.enable")
+    await session.send("Network.setBlockedURLs", {"urls": patterns})
+    return stats
+
+
+async def _install_route(page: Page, policy: RequestPolicy) -> RequestFilterStats:
+    """Routes every request through Playwright; bytes loaded come from Content-Length headers."""
+    stats = RequestFilterStats()
+
+    async def handle(route: Route):
+        request = route.request
+        reason = policy.block_reason(request.url, request.resource_type)
+        if reason is None:
+            stats.allowed_requests += 1
+            await route.continue_()
+            return
+        stats.block(reason, request.resource_type)
+        await route.abort()
+
+    def on_response(response: Response):
+        length = response.headers.get("content-length")
+        if length and length.isdigit():
+            stats.bytes_loaded += int(length)
+
+    await page.route("**/*", handle)
+    page.on("response", on_response)
+    return stats
@@ -0,0 +1,182 @@
+import asyncio
+import math
+import re
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from extraction_profiles import profile_for_url, read_profile, site_for_url
+from http_fetcher import HttpFetcher
+from product_parser import extract_reviews
+from rate_limiter import paced_goto
+
+# Fetches one review page and returns its HTML, or None when the fetch failed
+PageFetcher = Callable[[str], Awaitable[Optional[str]]]
+
+
+def review_key(review: Dict) -> Tuple:
+    """Identity of a review across pages and crawls."""
+    return (review.get("reviewer"), review.get("date"), review.get("title"))
+
+
+def merge_reviews(*review_lists: List[Dict]) -> List[Dict]:
+    """Concatenates review lists in order, keeping the first copy of each (reviewer, date, title)."""
+    merged = {}
+    for reviews in review_lists:
+        for review in reviews:
+            merged.setdefault(review_key(review), review)
+    return list(merged.values())
+
+
+def review_count(number_of_reviews) -> Optional[int]:
+    """Parses the review count shown on the product page, e.g. "335Reviews" or "1,204 Reviews"."""
+    if number_of_reviews is None:
+        return None
+    digits = re.sub(r"[^\d]", "", str(number_of_reviews))
+    return int(digits) if digits else None
+
+
+@lru_cache(maxsize=None)
+def review_pages_config(site: str) -> Optional[Dict]:
+    """The product profile's "review_pages" settings for a site, None when it has none."""
+    return read_profile("product", site).get("review_pages")
+
+
+def http_review_fetcher(fetcher: HttpFetcher) -> PageFetcher:
+    """Review pages over the pooled HTTP client, for sites that render reviews server-side."""
+    async def fetch(page_url: str) -> Optional[str]:
+        try:
+            response = await fetcher.get(page_url)
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"Review page failed {page_url}: {e}")
+            return None
+        return response.text
+    return fetch
+
+
+def browser_review_fetcher(pool, timeout: int = 10000) -> PageFetcher:
+    """Review pages through the browser pool, waiting for the review list to render."""
+    async def fetch(page_url: str) -> Optional[str]:
+        try:
+            async with pool.page() as page:
+                await paced_goto(page, page_url)
+                try:
+                    await page.wait_for_selector(profile_for_url(page_url, "product").css("review_items"), timeout=timeout)
+                except PlaywrightTimeoutError:
+                    # Past the last page there is no review list to wait for
+                    pass
+                return await page.content()
+        except Exception as e:
+            print(f"Review page failed {page_url}: {e}")
+            return None
+    return fetch
+
+
+class ReviewHarvester:
+    """
+    Pages through every review of a product and merges them into its Reviews structure.
+
+    The product page already holds review page 1; pages 2..N come from the site's
+    "review_pages" URL template in its product profile (profiles/<site>/product.json)
+    and are parsed with the profile's review selectors. The template has to be
+    the paging request the site's review widget really makes (copied from the
+    browser's network log); a site without one keeps its first page of reviews. `concurrency` bounds the
+    review pages in flight across every product this harvester works on.
+
+    A full harvest with a known review count fetches page 2 and, if it holds
+    reviews not seen on page 1, every remaining page at once; without a count it
+    fetches in waves of `concurrency` pages until a page comes back empty.
+    An incremental harvest (with the reviews already stored for the product,
+    newest first) fetches in waves and stops at the page holding the newest
+    stored review, so a re-crawl only pays for the reviews posted since.
+    Paging always stops at a page that adds no new reviews, so a site that
+    ignores the page parameter costs one extra fetch per product, not max_pages.
+
+    Usage:
+        harvester = ReviewHarvester(browser_review_fetcher(pool), concurrency=4)
+        product["Reviews"] = await harvester.harvest(url, product["Reviews"], stored=old_reviews)
+    """
+
+    def __init__(self, fetch_page: PageFetcher, concurrency: int = 4, max_pages: int = 200):
+        self.fetch_page = fetch_page
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.stats = {"products": 0, "pages_fetched": 0, "pages_failed": 0, "new_reviews": 0, "duplicates": 0}
+        self._limit = asyncio.Semaphore(concurrency)
+
+    async def _fetch(self, url: str, template: str, page: int) -> Optional[List[Dict]]:
+        page_url = template.format(url=url, sep="&" if "?" in url else "?", page=page)
+        async with self._limit:
+            content = await self.fetch_page(page_url)
+        if content is None:
+            self.stats["pages_failed"] += 1
+            return None
+        self.stats["pages_fetched"] += 1
+        return extract_reviews(content, url)
+
+    async def harvest(self, url: str, reviews: Dict, stored: Optional[List[Dict]] = None) -> Dict:
+        """Returns a copy of `reviews` whose individual_reviews covers every page, deduplicated."""
+        config = review_pages_config(site_for_url(url))
+        first_page = reviews.get("individual_reviews") or []
+        if config is None or not first_page:
+            return dict(reviews, individual_reviews=merge_reviews(first_page, stored or []))
+
+        self.stats["products"] += 1
+        page_size = config.get("page_size") or len(first_page)
+        total = review_count(reviews.get("number_of_reviews"))
+        last_page = min(math.ceil(total / page_size), self.max_pages) if total else self.max_pages
+        stop_key = review_key(stored[0]) if stored else None
+
+        pages: List[List[Dict]] = [first_page]
+        seen = {review_key(review) for review in first_page}
+
+        def adds_new(page_reviews: List[Dict]) -> bool:
+            keys = {review_key(review) for review in page_reviews}
+            new = not keys <= seen
+            seen.update(keys)
+            return new
+
+        if last_page < 2 or stop_key in seen:
+            pass
+        elif stop_key is None and total:
+            # Full harvest with a known page count: check that paging works on page 2, then the rest in parallel
+            second = await self._fetch(url, config["url"], 2)
+            if second and adds_new(second):
+                pages.append(second)
+                fetched = await asyncio.gather(*(self._fetch(url, config["url"], page) for page in range(3, last_page + 1)))
+                pages.extend(page for page in fetched if page)
+        else:
+            next_page = 2
+            while next_page <= last_page:
+                wave = range(next_page, min(next_page + self.concurrency, last_page + 1))
+                fetched = await asyncio.gather(*(self._fetch(url, config["url"], page) for page in wave))
+                done = False
+                for page_reviews in fetched:
+                    if page_reviews is None:
+                        continue
+                    if not page_reviews or not adds_new(page_reviews):
+                        # Past the last page, or the site served a page already seen
+                        done = True
+                        break
+                    pages.append(page_reviews)
+                    if stop_key in {review_key(review) for review in page_reviews}:
+                        done = True
+                        break
+                if done:
+                    break
+                next_page += self.concurrency
+
+        harvested = [review for page_reviews in pages for review in page_reviews]
+        if stop_key is not None:
+            keys = [review_key(review) for review in harvested]
+            if stop_key in keys:
+                harvested = harvested[:keys.index(stop_key)]
+        merged = merge_reviews(harvested, stored or [])
+        # Reviews the product did not already have from its first page or the store
+        self.stats["new_reviews"] += max(0, len(merged) - len(merge_reviews(first_page, stored or [])))
+        self.stats["duplicates"] += len(harvested) + len(stored or []) - len(merged)
+        print(f"Reviews for {url}: {len(merged)} after {len(pages) - 1} extra pages")
+        return dict(reviews, individual_reviews=merged)
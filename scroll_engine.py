@@ -0,0 +1,203 @@
+import asyncio
+import collections
+import time
+from typing import Dict, List
+from playwright.async_api import Page, Request
+
+# Resolves once tiles were added and the DOM then stayed quiet for `settle` ms ("mutation"),
+# once nothing at all changed for `quiet` ms ("quiet"), or after `timeout` ms ("timeout")
+WAIT_FOR_TILES_JS = """
+({css, before, settle, quiet, timeout}) => new Promise(resolve => {
+    const start = performance.now();
+    let grew = false;
+    let timer = null;
+    const finish = reason => {
+        observer.disconnect();
+        clearTimeout(timer);
+        clearTimeout(hardStop);
+        resolve({count: document.querySelectorAll(css).length, reason, ms: performance.now() - start});
+    };
+    const arm = () => {
+        clearTimeout(timer);
+        timer = setTimeout(() => finish(grew ? "mutation" : "quiet"), grew ? settle : quiet);
+    };
+    const observer = new MutationObserver(() => {
+        if (!grew && document.querySelectorAll(css).length > before) {
+            grew = true;
+        }
+        arm();
+    });
+    observer.observe(document.body, {childList: true, subtree: true});
+    const hardStop = setTimeout(() => finish("timeout"), timeout);
+    arm();
+})
+"""
+
+SCROLL_JS = """
+step => {
+    window.scrollBy(0, step);
+    return {
+        y: window.scrollY,
+        atBottom: window.innerHeight + window.scrollY >= document.body.scrollHeight - 100,
+    };
+}
+"""
+
+
+class NetworkTracker:
+    """Counts the page's XHR/fetch requests in flight, for a network-idle signal."""
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.in_flight = 0
+        self.last_activity = time.monotonic()
+        page.on("request", self._started)
+        page.on("requestfinished", self._finished)
+        page.on("requestfailed", self._finished)
+
+    def close(self):
+        self.page.remove_listener("request", self._started)
+        self.page.remove_listener("requestfinished", self._finished)
+        self.page.remove_listener("requestfailed", self._finished)
+
+    def _started(self, request: Request):
+        if request.resource_type in ("xhr", "fetch"):
+            self.in_flight += 1
+            self.last_activity = time.monotonic()
+
+    def _finished(self, request: Request):
+        if request.resource_type in ("xhr", "fetch"):
+            self.in_flight = max(0, self.in_flight - 1)
+            self.last_activity = time.monotonic()
+
+    async def wait_idle(self, idle: float, timeout: float) -> bool:
+        """Waits until no request has been in flight for `idle` seconds; False on timeout."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.in_flight == 0 and time.monotonic() - self.last_activity >= idle:
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+
+class ScrollEngine:
+    """
+    Scrolls an infinite-scroll listing until no more product tiles load.
+
+    After each scroll it waits inside the page on a MutationObserver instead of
+    a fixed sleep: it returns as soon as new tiles have rendered and the DOM has
+    settled, or when the DOM stays quiet and no XHR/fetch is in flight. Tiles
+    are counted in the page, so no element handles cross into Python.
+
+    The step adapts to how the listing loads: it grows while batches arrive
+    quickly, shrinks when they slow down, and doubles when a scroll landed in
+    already-loaded content. Every scroll's timing is logged and kept in `log`.
+    """
+
+    def __init__(
+        self,
+        initial_step: int = 800,
+        min_step: int = 400,
+        max_step: int = 4000,
+        fast_ms: float = 800,
+        slow_ms: float = 2500,
+        settle_ms: int = 300,
+        quiet_ms: int = 1000,
+        timeout_ms: int = 8000,
+        max_scrolls: int = 100,
+        max_empty_scrolls: int = 3,
+    ):
+        self.step = initial_step
+        self.min_step = min_step
+        self.max_step = max_step
+        self.fast_ms = fast_ms
+        self.slow_ms = slow_ms
+        self.settle_ms = settle_ms
+        self.quiet_ms = quiet_ms
+        self.timeout_ms = timeout_ms
+        self.max_scrolls = max_scrolls
+        self.max_empty_scrolls = max_empty_scrolls
+        self.log: List[Dict] = []
+
+    async def count_tiles(self, page: Page, tile_css: str) -> int:
+        return await page.evaluate("css => document.querySelectorAll(css).length", tile_css)
+
+    async def _wait_for_tiles(self, page: Page, tile_css: str, before: int, network: NetworkTracker) -> Dict:
+        options = {
+            "css": tile_css,
+            "before": before,
+            "settle": self.settle_ms,
+            "quiet": self.quiet_ms,
+            "timeout": self.timeout_ms,
+        }
+        result = await page.evaluate(WAIT_FOR_TILES_JS, options)
+        if result["reason"] == "quiet" and network.in_flight:
+            # The DOM is quiet but the next batch is still being fetched
+            start = time.perf_counter()
+            await network.wait_idle(self.settle_ms / 1000, self.timeout_ms / 1000)
+            options["timeout"] = self.quiet_ms
+            again = await page.evaluate(WAIT_FOR_TILES_JS, options)
+            again["ms"] += result["ms"] + (time.perf_counter() - start) * 1000
+            result = again
+        return result
+
+    def _adapt(self, added: int, wait_ms: float):
+        if added == 0:
+            # Landed in content that was already loaded: jump further next time
+            self.step *= 2
+        elif wait_ms <= self.fast_ms:
+            self.step *= 1.5
+        elif wait_ms >= self.slow_ms:
+            self.step *= 0.75
+        self.step = int(min(self.max_step, max(self.min_step, self.step)))
+
+    async def run(self, page: Page, tile_css: str) -> Dict:
+        """Scrolls until the listing stops growing and returns a timing summary."""
+        network = NetworkTracker(page)
+        try:
+            return await self._run(page, tile_css, network)
+        finally:
+            network.close()
+
+    async def _run(self, page: Page, tile_css: str, network: NetworkTracker) -> Dict:
+        start = time.perf_counter()
+        count = await self.count_tiles(page, tile_css)
+        empty = 0
+
+        for scroll in range(1, self.max_scrolls + 1):
+            step = self.step
+            position = await page.evaluate(SCROLL_JS, step)
+            result = await self._wait_for_tiles(page, tile_css, count, network)
+            added = result["count"] - count
+            count = result["count"]
+
+            entry = {
+                "scroll": scroll,
+                "step": step,
+                "added": added,
+                "tiles": count,
+                "wait_ms": round(result["ms"]),
+                "signal": result["reason"],
+            }
+            self.log.append(entry)
+            print(f"Scroll {scroll}: +{added} tiles ({count} total) after {entry['wait_ms']} ms "
+                  f"[{entry['signal']}], step {step}px")
+
+            self._adapt(added, result["ms"])
+            empty = 0 if added else empty + 1
+            if added == 0 and position["atBottom"]:
+                print("Reached bottom of page. Stopping scroll.")
+                break
+            if empty >= self.max_empty_scrolls:
+                print("No new products detected. Stopping scroll.")
+                break
+
+        summary = {
+            "scrolls": len(self.log),
+            "tiles": count,
+            "seconds": round(time.perf_counter() - start, 2),
+            "wait_seconds": round(sum(entry["wait_ms"] for entry in self.log) / 1000, 2),
+            "signals": dict(collections.Counter(entry["signal"] for entry in self.log)),
+        }
+        print(f"\nTotal products loaded: {count} ({summary})")
+        return summary
@@ -0,0 +1,217 @@
+import asyncio
+import gzip
+import io
+import os
+import time
+import xml.etree.ElementTree as ElementTree
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import unquote, urljoin, urlparse
+from urllib.request import url2pathname
+
+import httpx
+
+from extraction_profiles import read_profile, site_for_url
+from http_fetcher import HttpFetcher
+from link_discovery import UrlFrontier
+from link_grabber import is_product_href, normalize_product_url
+
+GZIP_MAGIC = b"\x1f\x8b"
+# A malformed, truncated or wrongly gzipped sitemap fails on its own without stopping discovery
+SITEMAP_ERRORS = (OSError, EOFError, httpx.HTTPError, ElementTree.ParseError)
+
+
+def sitemaps_from_robots(robots_txt: str, base_url: str) -> List[str]:
+    """The Sitemap: entries of a robots.txt, resolved against `base_url`."""
+    sitemaps = []
+    for line in robots_txt.splitlines():
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "sitemap" and value.strip():
+            sitemaps.append(urljoin(base_url, value.strip()))
+    return sitemaps
+
+
+def _local_path(source: str) -> Optional[str]:
+    """The filesystem path of a file:// URL or plain path, None for http(s) URLs."""
+    parts = urlparse(source)
+    if parts.scheme == "file":
+        return url2pathname(unquote(parts.path))
+    if parts.scheme in ("http", "https"):
+        return None
+    return source
+
+
+def _is_web_url(url: str) -> bool:
+    return url.startswith(("http://", "https://"))
+
+
+def _as_url(source: str) -> str:
+    """Local paths become file:// URLs, so relative <loc> entries in fixtures resolve next to them."""
+    if urlparse(source).scheme in ("http", "https", "file"):
+        return source
+    return "file://" + os.path.abspath(source).replace(os.sep, "/")
+
+
+def _open_stream(stream: BinaryIO) -> BinaryIO:
+    """Wraps the stream in a streaming gunzip when it starts with the gzip magic bytes."""
+    buffered = stream if hasattr(stream, "peek") else io.BufferedReader(stream)
+    if buffered.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=buffered)
+    return buffered
+
+
+def iter_sitemap(stream: BinaryIO) -> Iterator[Tuple[str, str]]:
+    """
+    Streams the entries of a sitemap or sitemap index, plain or gzipped, as
+    (kind, loc) pairs: kind "sitemap" for an index entry, "url" for a page.
+    Each entry is dropped from the tree once read, so memory stays flat however
+    large the file is.
+    """
+    root = None
+    loc = None
+    for event, element in ElementTree.iterparse(_open_stream(stream), events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            continue
+        # Local name of "{namespace}name"; sitemaps with image/video extensions nest more <loc>s in each entry
+        tag = element.tag
+        name = tag[tag.rfind("}") + 1:]
+        if name == "loc":
+            if loc is None and element.text:
+                loc = element.text.strip()
+        elif name == "url" or name == "sitemap":
+            if loc:
+                yield name, loc
+            loc = None
+            root.clear()
+
+
+def parse_sitemap(data: bytes) -> List[Tuple[str, str]]:
+    return list(iter_sitemap(io.BytesIO(data)))
+
+
+def parse_sitemap_file(path: str) -> List[Tuple[str, str]]:
+    with open(path, "rb") as f:
+        return list(iter_sitemap(f))
+
+
+class SitemapDiscovery:
+    """
+    Discovers product URLs from a site's sitemaps instead of rendering its listings.
+
+    Starting points are robots.txt files (their Sitemap: lines are followed),
+    sitemap indexes or sitemaps, given as http(s) URLs, file:// URLs or local
+    paths, so a saved copy of a site's sitemaps can be used as a fixture.
+    Local files are only read when given as a starting point or listed by a
+    local file: a robots.txt or sitemap fetched over http(s) can only lead to
+    other http(s) URLs, anything else it lists is dropped.
+    Indexes are followed level by level, `concurrency` files at a time; each
+    file is parsed as a stream in a worker thread. Page URLs pass the same
+    /products/ filter as the listing crawler, are normalized, and end up in a
+    UrlFrontier with the sitemap they came from as their source.
+
+    Usage:
+        frontier = await SitemapDiscovery().discover(["https://www.coach.com/robots.txt"])
+    """
+
+    def __init__(
+        self,
+        fetcher: Optional[HttpFetcher] = None,
+        concurrency: int = 4,
+        max_sitemaps: int = 1000,
+        keep_params: Optional[Iterable[str]] = None,
+    ):
+        self.fetcher = fetcher
+        self.concurrency = concurrency
+        self.max_sitemaps = max_sitemaps
+        self.keep_params = keep_params
+        self.stats = {"sitemaps": 0, "failed": 0, "rejected": 0, "urls_seen": 0, "products": 0, "seconds": 0.0}
+
+    async def discover(self, sources: Iterable[str]) -> UrlFrontier:
+        sources = list(sources)
+        if self.fetcher is None and any(_local_path(source) is None for source in sources):
+            async with HttpFetcher() as fetcher:
+                self.fetcher = fetcher
+                try:
+                    return await self.discover(sources)
+                finally:
+                    self.fetcher = None
+
+        start = time.perf_counter()
+        frontier = UrlFrontier()
+        limit = asyncio.Semaphore(self.concurrency)
+        seen = set()
+        level: List[str] = []
+        for source in sources:
+            source = _as_url(source)
+            if urlparse(source).path.endswith("/robots.txt"):
+                sitemaps = sitemaps_from_robots(await self._read_text(source), source)
+                if _is_web_url(source):
+                    self.stats["rejected"] += sum(1 for sitemap in sitemaps if not _is_web_url(sitemap))
+                    sitemaps = [sitemap for sitemap in sitemaps if _is_web_url(sitemap)]
+                level.extend(sitemaps or [urljoin(source, "/sitemap.xml")])
+            else:
+                level.append(source)
+
+        while level and self.stats["sitemaps"] < self.max_sitemaps:
+            level = [sitemap for sitemap in dict.fromkeys(level) if sitemap not in seen]
+            level = level[:self.max_sitemaps - self.stats["sitemaps"]]
+            seen.update(level)
+            self.stats["sitemaps"] += len(level)
+            entries = await asyncio.gather(*(self._read_sitemap(sitemap, limit) for sitemap in level))
+
+            next_level = []
+            for sitemap, sitemap_entries in zip(level, entries):
+                keep_params = self._keep_params(sitemap)
+                remote = _is_web_url(sitemap)
+                for kind, loc in sitemap_entries:
+                    if not _is_web_url(loc):
+                        loc = urljoin(sitemap, loc)
+                        if remote and not _is_web_url(loc):
+                            # e.g. a file:// URL in a fetched index, which must never read local files
+                            self.stats["rejected"] += 1
+                            continue
+                    if kind == "sitemap":
+                        next_level.append(loc)
+                        continue
+                    self.stats["urls_seen"] += 1
+                    if is_product_href(loc.partition("?")[0]):
+                        frontier.add(normalize_product_url(loc, keep_params), sitemap)
+            level = next_level
+
+        self.stats["products"] = len(frontier)
+        self.stats["seconds"] = round(time.perf_counter() - start, 3)
+        print(f"Sitemap discovery: {self.stats}")
+        return frontier
+
+    def _keep_params(self, url: str) -> Iterable[str]:
+        if self.keep_params is not None:
+            return self.keep_params
+        return read_profile("listing", site_for_url(url)).get("keep_query_params", [])
+
+    async def _read_text(self, source: str) -> str:
+        path = _local_path(source)
+        try:
+            if path is not None:
+                with open(path, "r", encoding="utf-8") as f:
+                    return f.read()
+            response = await self.fetcher.get(source)
+            response.raise_for_status()
+            return response.text
+        except (OSError, httpx.HTTPError) as e:
+            print(f"Could not read {source}: {e}")
+            return ""
+
+    async def _read_sitemap(self, sitemap: str, limit: asyncio.Semaphore) -> List[Tuple[str, str]]:
+        async with limit:
+            path = _local_path(sitemap)
+            try:
+                if path is not None:
+                    return await asyncio.to_thread(parse_sitemap_file, path)
+                response = await self.fetcher.get(sitemap)
+                response.raise_for_status()
+                return await asyncio.to_thread(parse_sitemap, response.content)
+            except SITEMAP_ERRORS as e:
+                self.stats["failed"] += 1
+                print(f"Could not read sitemap {sitemap}: {e}")
+                return []
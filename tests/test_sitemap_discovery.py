@@ -0,0 +1,67 @@
+"""
+Sitemap discovery over the saved fixture in tests/fixtures/sitemaps (robots.txt,
+a sitemap index and one gzipped child). Run from the repository root:
+    python -m pytest tests
+"""
+import asyncio
+import os
+
+from sitemap_discovery import SitemapDiscovery
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "sitemaps")
+INDEX_URL = "file://" + os.path.abspath(os.path.join(FIXTURE, "sitemap_index.xml")).replace(os.sep, "/")
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.content = text.encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeFetcher:
+    """Serves fixed bodies for http(s) URLs and records every URL requested."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    async def get(self, url: str) -> FakeResponse:
+        self.requested.append(url)
+        return FakeResponse(self.pages[url])
+
+
+def test_local_fixture_follows_gzip_index():
+    discovery = SitemapDiscovery(keep_params=())
+    frontier = asyncio.run(discovery.discover([os.path.join(FIXTURE, "robots.txt")]))
+
+    # The ?rrec=true copy collapses into its product, category and story pages are not products
+    assert sorted(frontier.urls()) == [
+        "https://www.coach.com/products/tabby-shoulder-bag-26/CH857-B4BK.html",
+        "https://www.coach.com/products/willow-tote/C0689-LHBLK.html",
+    ]
+    assert discovery.stats["sitemaps"] == 2
+    assert discovery.stats["urls_seen"] == 5
+    assert discovery.stats["failed"] == 0
+
+
+def test_remote_sitemap_cannot_point_at_local_files():
+    fetcher = FakeFetcher({
+        "https://www.example.com/robots.txt": f"Sitemap: {INDEX_URL}\nSitemap: /sitemap_index.xml\n",
+        "https://www.example.com/sitemap_index.xml": (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            f"<sitemap><loc>{INDEX_URL}</loc></sitemap>\n"
+            "</sitemapindex>\n"
+        ),
+    })
+    discovery = SitemapDiscovery(fetcher=fetcher, keep_params=())
+    frontier = asyncio.run(discovery.discover(["https://www.example.com/robots.txt"]))
+
+    assert len(frontier) == 0
+    assert fetcher.requested == ["https://www.example.com/robots.txt", "https://www.example.com/sitemap_index.xml"]
+    # Once in robots.txt, once in the index
+    assert discovery.stats["rejected"] == 2
+    assert discovery.stats["sitemaps"] == 1